@@ -0,0 +1,118 @@
+import binascii
+
+BYTE_BITS = tuple(
+    tuple(
+        bit
+        for bit in xrange(8)
+        if byte & (1 << bit)
+    )
+    for byte in xrange(256)
+)
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+def mask_to_bytes(mask):
+    """The little-endian bytes of a non-negative mask"""
+    hex_mask = '%x' % mask
+    if len(hex_mask) % 2:
+        hex_mask = '0' + hex_mask
+
+    return bytearray(binascii.unhexlify(hex_mask))[::-1]
+
+
+def bytes_to_mask(data):
+    if not data:
+        return 0
+
+    return int(binascii.hexlify(data[::-1]), 16)
+
+
+def iter_mask_ids(mask):
+    """The indexes of the set bits of a mask, in ascending order"""
+    if mask <= 0:
+        assert mask == 0, "Cannot iterate negative mask %s" % mask
+        return
+
+    for byte_index, byte in enumerate(mask_to_bytes(mask)):
+        if byte:
+            base = byte_index << 3
+            for bit in BYTE_BITS[byte]:
+                yield base + bit
+
+
+def ids_to_mask(ids):
+    return Bitset.from_ids(ids).mask
+
+
+class Bitset(object):
+    """
+    A fixed size set of bits, packed in a `bytearray`. Single bits are read and
+    written in constant time, and the whole set is available as an integer
+    `mask`, for bitwise operations.
+    A `shared` bitset should be copied before it's changed
+    """
+    def __init__(self, size, value=False):
+        self.size = size
+        self.shared = False
+        byte_count = (size + 7) // 8
+        if value:
+            self.data = bytearray('\xff' * byte_count)
+            extra_bits = byte_count * 8 - size
+            if extra_bits:
+                self.data[-1] >>= extra_bits
+        else:
+            self.data = bytearray(byte_count)
+        self._mask = None
+
+    @classmethod
+    def from_ids(cls, ids, size=None):
+        ids = tuple(ids)
+        if size is None:
+            size = max(ids) + 1 if ids else 0
+        bitset = cls(size)
+        data = bitset.data
+        for index in ids:
+            data[index >> 3] |= 1 << (index & 7)
+
+        return bitset
+
+    def copy(self):
+        bitset = type(self)(0)
+        bitset.size = self.size
+        bitset.data = bytearray(self.data)
+        bitset._mask = self._mask
+
+        return bitset
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        return bool(self.data[index >> 3] & (1 << (index & 7)))
+
+    def __setitem__(self, index, value):
+        if value:
+            self.data[index >> 3] |= 1 << (index & 7)
+        else:
+            self.data[index >> 3] &= ~(1 << (index & 7))
+        self._mask = None
+
+    def flip(self, index):
+        self.data[index >> 3] ^= 1 << (index & 7)
+        self._mask = None
+
+    @property
+    def mask(self):
+        if self._mask is None:
+            self._mask = bytes_to_mask(self.data)
+
+        return self._mask
+
+    def count(self):
+        return popcount(self.mask)
+
+    def iter_ids(self):
+        return iter_mask_ids(self.mask)
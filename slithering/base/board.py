@@ -1,36 +1,159 @@
+from slithering.base import parts
 from slithering.base import puzzle_svg
+from slithering.base.bitset import iter_mask_ids
+from slithering.base.state import BoardState
+from slithering.base.topology import Topology
+from slithering.utils import cached_property
 
 
 class Board(object):
+    """
+    A board is a view of a topology, that is shared by all boards of the same
+    shape, and a state of its own.
+    The parts are created only when they are first needed
+    """
     svg_generator_class = puzzle_svg.PuzzleSVG
 
-    def __init__(self):
+    collection_classes = {
+        'cells': parts.Cells,
+        'sides': parts.Sides,
+        'corners': parts.Corners,
+    }
+
+    topology_cache = {}
+
+    def __init__(self, state=None, topology=None):
         self._frozen = False
 
-        self.cells = self.create_cells()
+        if topology is None:
+            topology = self.get_topology()
+        self.topology = topology
+        if state is None:
+            state = BoardState(self.topology)
+        self.state = state
+        self.clear_related_parts_cache()
+
         self.freeze()
 
+    def get_shape_kwargs(self):
+        """The arguments that define the shape of the board"""
+        return {}
+
+    def get_topology_key(self):
+        shape_kwargs = self.get_shape_kwargs()
+        if not shape_kwargs:
+            return None
+
+        return (type(self),) + tuple(sorted(shape_kwargs.iteritems()))
+
+    def get_topology(self):
+        topology_key = self.get_topology_key()
+        if topology_key is None:
+            return self.create_topology()
+
+        topology = self.topology_cache.get(topology_key)
+        if topology is None:
+            topology = self.topology_cache[topology_key] = \
+                self.create_topology()
+
+        return topology
+
+    @classmethod
+    def clear_topology_cache(cls):
+        cls.topology_cache.clear()
+
+    def create_topology(self):
+        cells = self.create_cells().frozen()
+        cells.freeze()
+        cells.sides.freeze()
+        cells.corners.freeze()
+
+        return Topology.from_cells(cells)
+
     def create_cells(self):
         raise NotImplementedError()
 
     def freeze(self):
-        self.cells = self.cells.frozen()
-        self.cells.freeze()
-        self.cells.sides.freeze()
-        self.cells.corners.freeze()
         self._frozen = True
 
-    @property
+    def fork(self):
+        """
+        A board with the same topology, and a copy-on-write fork of the state
+        """
+        return type(self)(
+            state=self.state.fork(), topology=self.topology,
+            **self.get_shape_kwargs())
+
+    @cached_property
+    def cells_by_id(self):
+        return tuple(
+            parts.Cell(key, self, cell_id)
+            for cell_id, key in enumerate(self.topology.cell_keys)
+        )
+
+    @cached_property
+    def sides_by_id(self):
+        return tuple(
+            parts.Side(self, side_id)
+            for side_id in xrange(self.topology.sides_count)
+        )
+
+    @cached_property
+    def corners_by_id(self):
+        return tuple(
+            parts.Corner(key, self, corner_id)
+            for corner_id, key in enumerate(self.topology.corner_keys)
+        )
+
+    def get_parts(self, kind, ids):
+        parts_by_id = getattr(self, '%s_by_id' % kind)
+        return self.collection_classes[kind](
+            parts_by_id[part_id]
+            for part_id in ids
+        )
+
+    def get_parts_from_mask(self, kind, mask):
+        parts = self.get_parts(kind, iter_mask_ids(mask))
+        parts.__dict__['mask'] = mask
+
+        return parts
+
+    def clear_related_parts_cache(self):
+        self.related_parts_cache = {}
+
+    def get_related_parts(self, relation_name, part_id):
+        """
+        The frozen collection of parts related to a part, created once from
+        the topology, when it's first needed
+        """
+        cache = self.related_parts_cache.get(relation_name)
+        if cache is None:
+            cache = self.related_parts_cache[relation_name] = \
+                [None] * len(getattr(self.topology, relation_name))
+        related_parts = cache[part_id]
+        if related_parts is None:
+            relation = getattr(self.topology, relation_name)
+            kind = Topology.relation_targets[relation_name]
+            related_parts = cache[part_id] = \
+                self.get_parts(kind, relation[part_id])
+
+        return related_parts
+
+    @cached_property
+    def cells(self):
+        return parts.Cells(self.cells_by_id)
+
+    @cached_property
     def sides(self):
-        return self.cells.sides
+        return parts.Sides(self.sides_by_id)
 
-    @property
+    @cached_property
     def corners(self):
-        return self.cells.corners
+        return parts.Corners(self.corners_by_id)
 
     @property
     def solved(self):
-        return not self.sides.unsolved
+        return self.state.sides_solved.count() == self.topology.sides_count
 
     @classmethod
     def register_svg_generator_class(cls, svg_generator_class):
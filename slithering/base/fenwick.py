@@ -0,0 +1,46 @@
+import array
+
+
+class FenwickTree(object):
+    """
+    A binary indexed tree of counts, by index, that can be updated and
+    searched by rank in O(log n)
+    """
+    def __init__(self, size):
+        self.size = size
+        self.tree = array.array('l', [0]) * (size + 1)
+        self.count = 0
+        self.highest_step = 1
+        while self.highest_step * 2 <= size:
+            self.highest_step *= 2
+
+    def add(self, index, delta):
+        self.count += delta
+        tree, size = self.tree, self.size
+        position = index + 1
+        while position <= size:
+            tree[position] += delta
+            position += position & -position
+
+    def find(self, rank):
+        """The index of the item at `rank`, in ascending index order"""
+        return self.locate(rank)[0]
+
+    def locate(self, rank):
+        """
+        The index of the item at `rank`, in ascending index order, and its
+        rank among the items at that index
+        """
+        assert 0 <= rank < self.count, \
+            "Rank %s is out of range for %s items" % (rank, self.count)
+        tree, size = self.tree, self.size
+        position = 0
+        step = self.highest_step
+        while step:
+            next_position = position + step
+            if next_position <= size and tree[next_position] <= rank:
+                position = next_position
+                rank -= tree[position]
+            step >>= 1
+
+        return position, rank
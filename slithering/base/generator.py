@@ -0,0 +1,198 @@
+import array
+import bisect
+
+from slithering.base.fenwick import FenwickTree
+from slithering.base.topology import Relation
+
+
+class IdBucket(object):
+    """
+    A set of ids, that can be picked by rank in ascending order.
+    The ids are kept in sorted blocks of consecutive ids, that are only
+    created while they have any ids, and a `FenwickTree` counts the ids per
+    block, so that the memory is proportional to the ids, and not to the
+    size, and both changing and picking an id take O(log n)
+    """
+    block_size = 64
+
+    def __init__(self, size):
+        self.blocks = {}
+        self.block_counts = FenwickTree(
+            (size + self.block_size - 1) // self.block_size)
+
+    @property
+    def count(self):
+        return self.block_counts.count
+
+    def add(self, item_id):
+        block_index = item_id // self.block_size
+        bisect.insort(self.blocks.setdefault(block_index, []), item_id)
+        self.block_counts.add(block_index, 1)
+
+    def remove(self, item_id):
+        block_index = item_id // self.block_size
+        block = self.blocks[block_index]
+        block.remove(item_id)
+        if not block:
+            del self.blocks[block_index]
+        self.block_counts.add(block_index, -1)
+
+    def find(self, rank):
+        """The id at `rank`, in ascending order"""
+        block_index, rank_in_block = self.block_counts.locate(rank)
+        return self.blocks[block_index][rank_in_block]
+
+
+class RatioIndex(object):
+    """
+    Ids grouped in buckets by a ratio, with a sorted list of the ratios that
+    have any ids, and an `IdBucket` per ratio, that is dropped when it's
+    empty, so that both moving an id to another bucket and picking an id by
+    rank take O(log n)
+    """
+    def __init__(self, size):
+        self.size = size
+        self.buckets_by_ratio = {}
+        self.ratios = []
+        self.ratio_by_id = {}
+
+    def __len__(self):
+        return len(self.ratio_by_id)
+
+    def __contains__(self, item_id):
+        return item_id in self.ratio_by_id
+
+    def __iter__(self):
+        return iter(self.ratio_by_id)
+
+    def set(self, item_id, ratio):
+        if self.ratio_by_id.get(item_id) == ratio:
+            return
+        self.discard(item_id)
+
+        bucket = self.buckets_by_ratio.get(ratio)
+        if bucket is None:
+            bucket = self.buckets_by_ratio[ratio] = IdBucket(self.size)
+            bisect.insort(self.ratios, ratio)
+        bucket.add(item_id)
+        self.ratio_by_id[item_id] = ratio
+
+    def discard(self, item_id):
+        ratio = self.ratio_by_id.pop(item_id, None)
+        if ratio is None:
+            return
+
+        bucket = self.buckets_by_ratio[ratio]
+        bucket.remove(item_id)
+        if not bucket.count:
+            del self.buckets_by_ratio[ratio]
+            self.ratios.remove(ratio)
+
+    def get_first_ratio_over(self, minimum_ratio):
+        """The smallest ratio that is at least the minimum, or the smallest"""
+        index = bisect.bisect_left(self.ratios, minimum_ratio)
+        if index == len(self.ratios):
+            index = 0
+
+        return self.ratios[index]
+
+    def choice(self, ratio, random):
+        """
+        Pick a random id of a bucket, exactly as `random.choice` would pick
+        from the sorted ids
+        """
+        bucket = self.buckets_by_ratio[ratio]
+        return bucket.find(int(random.random() * bucket.count))
+
+
+class GeneratorState(object):
+    """
+    The state of the random puzzle generation, by cell id, that is updated
+    locally whenever a cell becomes internal, instead of being recalculated
+    from the whole board:
+
+    * the number of internal cells
+    * the frontier: the external cells that neighbour an internal one
+    * the number of internal cells adjacent to each cell
+    * whether the internal adjacent cells of a frontier cell are connected,
+      so that adding it won't split the external cells
+    * the permissible cells: the non-splitting cells of the frontier, indexed
+      by their ratio of internal adjacent cells
+    """
+    def __init__(self, board):
+        topology = board.topology
+        self.cells_count = topology.cells_count
+        self.neighbours = topology.cell_neighbours
+        self.adjacent_cells = topology.cell_adjacent_cells
+
+        self.is_internal = bytearray(self.cells_count)
+        self.internal_count = 0
+        self.adjacent_internal_counts = \
+            array.array(Relation.typecode, [0] * self.cells_count)
+        self.frontier = set()
+        self.permissible = RatioIndex(self.cells_count)
+
+        for cell_id in board.state.cells_internal.iter_ids():
+            self.add_internal_cell(cell_id)
+
+    def add_internal_cell(self, cell_id):
+        if self.is_internal[cell_id]:
+            return
+
+        self.is_internal[cell_id] = True
+        self.internal_count += 1
+        self.frontier.discard(cell_id)
+        self.permissible.discard(cell_id)
+
+        for neighbour_id in self.neighbours[cell_id]:
+            if not self.is_internal[neighbour_id]:
+                self.frontier.add(neighbour_id)
+
+        for adjacent_id in self.adjacent_cells[cell_id]:
+            self.adjacent_internal_counts[adjacent_id] += 1
+            if adjacent_id in self.frontier:
+                self.update_permissible(adjacent_id)
+
+    def update_permissible(self, cell_id):
+        if self.is_non_splitting(cell_id):
+            self.permissible.set(
+                cell_id, self.get_internal_adjacent_cells_ratio(cell_id))
+        else:
+            self.permissible.discard(cell_id)
+
+    def is_non_splitting(self, cell_id):
+        """Are the internal adjacent cells connected to each other"""
+        internal_adjacent_ids = {
+            adjacent_id
+            for adjacent_id in self.adjacent_cells[cell_id]
+            if self.is_internal[adjacent_id]
+        }
+        a_cell_id = internal_adjacent_ids.pop()
+        stack = [a_cell_id]
+        while stack and internal_adjacent_ids:
+            for neighbour_id in self.neighbours[stack.pop()]:
+                if neighbour_id in internal_adjacent_ids:
+                    internal_adjacent_ids.remove(neighbour_id)
+                    stack.append(neighbour_id)
+
+        return not internal_adjacent_ids
+
+    def get_internal_adjacent_cells_ratio(self, cell_id):
+        return 1. * self.adjacent_internal_counts[cell_id] \
+            / self.adjacent_cells.degree(cell_id)
+
+    def get_random_cell_id(self, random):
+        """
+        Pick a permissible cell, preferring the ones with the smallest ratio
+        of internal adjacent cells that is over a random threshold
+        """
+        minimum_ratio = random.random()
+        if not self.internal_count:
+            # All cells are permissible, with a ratio of 0
+            return int(random.random() * self.cells_count)
+        if not self.permissible:
+            raise IndexError("There are no permissible cells")
+
+        ratio = self.permissible.get_first_ratio_over(minimum_ratio)
+
+        return self.permissible.choice(ratio, random)
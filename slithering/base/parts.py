@@ -1,7 +1,12 @@
+from slithering.base.bitset import ids_to_mask, popcount
+from slithering.utils import cached_property_on_freeze, \
+    cached_property_on_version
+
+
 class KeyedSet(object):
     _frozen = False
 
-    @property
+    @cached_property_on_freeze
     def by_key(self):
         return {
             item.key: item
@@ -25,25 +30,137 @@ class KeyedSet(object):
 
 
 class SetBase(KeyedSet):
+    kind = None
+    # Collections up to this size are filtered by testing each part's bit,
+    # which is cheaper than operating on board-sized masks, and their derived
+    # properties are not worth caching
+    small_size = 64
+
     def peek(self):
         return next(iter(self))
 
+    @property
+    def board(self):
+        if not self:
+            return None
 
-class Cell(object):
-    def __init__(self, key):
-        self._frozen = False
+        return self.peek().board
 
-        self.key = key
-        self.sides = MutableSides()
-        self.is_internal = False
+    @property
+    def version_cache(self):
+        if not self._frozen or len(self) <= self.small_size:
+            return None
 
-        self._solved = False
+        return self.board.state.cache
 
-        self.hint_is_given = True
+    @cached_property_on_freeze
+    def mask(self):
+        """The ids of the parts, as a bit mask"""
+        return ids_to_mask(part.id for part in self)
 
-    def __unicode__(self):
-        return u'Cell %s %s' % \
-            (self.key, 'internal' if self.is_internal else 'external')
+    def with_state(self, state_bitset_name, value=True):
+        """
+        The parts that have the bit set (or unset) in the state bitset,
+        computed by a bitwise operation on the masks
+        """
+        if not self:
+            return self.frozen()
+
+        board = self.board
+        state_bitset = getattr(board.state, state_bitset_name)
+        if len(self) <= self.small_size:
+            return board.collection_classes[self.kind](
+                part
+                for part in self
+                if state_bitset[part.id] == value
+            )
+
+        state_mask = state_bitset.mask
+        if value:
+            mask = self.mask & state_mask
+        else:
+            mask = self.mask & ~state_mask
+
+        return board.get_parts_from_mask(self.kind, mask)
+
+    def count_with_state(self, state_bitset_name, value=True):
+        """The number of parts that have the bit set (or unset)"""
+        if not self:
+            return 0
+
+        state_bitset = getattr(self.board.state, state_bitset_name)
+        if len(self) <= self.small_size:
+            return sum(
+                1
+                for part in self
+                if state_bitset[part.id] == value
+            )
+
+        state_mask = state_bitset.mask
+        if value:
+            return popcount(self.mask & state_mask)
+        else:
+            return popcount(self.mask & ~state_mask)
+
+
+class related_parts(object):
+    """
+    The frozen collection of parts related to a part, looked up by id in the
+    topology of its board.
+    Before the part is bound to a board, the related parts are kept in
+    `building_attribute`, if the part has one
+    """
+    def __init__(self, relation_name, building_attribute=None):
+        self.relation_name = relation_name
+        self.building_attribute = building_attribute
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        board = instance.board
+        if board is None and self.building_attribute:
+            return getattr(instance, self.building_attribute)
+
+        cache = board.related_parts_cache.get(self.relation_name)
+        if cache is not None:
+            related_parts = cache[instance.id]
+            if related_parts is not None:
+                return related_parts
+
+        return board.get_related_parts(self.relation_name, instance.id)
+
+    def __set__(self, instance, value):
+        if not self.building_attribute:
+            raise AttributeError(
+                "Cannot set '%s' of %s" % (self.relation_name, instance))
+        if instance.board is not None:
+            raise AttributeError(
+                "Cannot set '%s' of %s after it was bound to a board"
+                % (self.relation_name, instance))
+
+        setattr(instance, self.building_attribute, value)
+
+
+class Part(object):
+    """
+    A slotted part of a board. The adjacency of the part is kept in its own
+    sets only while the topology is being created: once it's bound to a board,
+    it's looked up in the topology
+    """
+    __slots__ = ('_frozen', 'id', 'board')
+    building_attributes = ()
+
+    def __init__(self, board=None, part_id=None):
+        self._frozen = board is not None
+        self.id = part_id
+        self.board = board
+        for building_attribute in self.building_attributes:
+            setattr(self, building_attribute, None)
+
+    @property
+    def is_building(self):
+        return self.board is None
 
     def __repr__(self):
         return u'<%s>' % self
@@ -51,13 +168,62 @@ class Cell(object):
     def __lt__(self, other):
         return self.key.__lt__(other.key)
 
+    def __hash__(self):
+        # Bound parts hash by id, so that sets of them are iterated in the
+        # same order in every process
+        if self.id is None:
+            return object.__hash__(self)
+
+        return self.id
+
+    @property
+    def state(self):
+        return self.board.state
+
+    @property
+    def version_cache(self):
+        return self.state.cache
+
+
+class Cell(Part):
+    __slots__ = ('key', '_sides')
+    building_attributes = ('_sides',)
+
+    def __init__(self, key, board=None, part_id=None):
+        super(Cell, self).__init__(board, part_id)
+        self.key = key
+        if self.is_building:
+            self._sides = MutableSides()
+
+    def __unicode__(self):
+        return u'Cell %s %s' % \
+            (self.key, 'internal' if self.is_internal else 'external')
+
     def freeze(self):
         self.sides = self.sides.frozen()
         self._frozen = True
 
+    sides = related_parts('cell_sides', '_sides')
+
+    @property
+    def is_internal(self):
+        return self.state.cells_internal[self.id]
+
+    @is_internal.setter
+    def is_internal(self, value):
+        self.state.set_cell_internal(self.id, value)
+
+    @property
+    def hint_is_given(self):
+        return self.state.cells_hint_given[self.id]
+
+    @hint_is_given.setter
+    def hint_is_given(self, value):
+        self.state.set_cell_hint_given(self.id, value)
+
     @property
     def solved(self):
-        return self._solved
+        return self.state.cells_solved[self.id]
 
     @property
     def solved_is_internal(self):
@@ -68,24 +234,20 @@ class Cell(object):
     def solved_is_internal(self, value):
         assert value == self.is_internal, \
             "Solved wrong value for %s: should be %s" % (self, self.is_internal)
-        self._solved = True
+        self.state.set_cell_solved(self.id)
 
     def add_sides(self, *sides):
         new_sides = set(sides) - self.sides
         self.sides.update(new_sides)
         [side.add_cells(self) for side in new_sides]
 
-    @property
-    def neighbours(self):
-        return self.sides.cells - {self}
+    neighbours = related_parts('cell_neighbours')
 
-    @property
+    @cached_property_on_version
     def hint(self):
         return len(self.sides.closed)
 
-    @property
-    def corners(self):
-        return self.sides.corners
+    corners = related_parts('cell_corners')
 
     @property
     def ordered_corners(self):
@@ -100,9 +262,7 @@ class Cell(object):
             )
         ]
 
-    @property
-    def adjacent_cells(self):
-        return self.corners.cells - {self}
+    adjacent_cells = related_parts('cell_adjacent_cells')
 
     def get_connected_cells_in(self, cells):
         cells = set(cells) | {self}
@@ -126,6 +286,8 @@ class Cell(object):
 
 
 class CellsBase(SetBase):
+    kind = 'cells'
+
     def frozen(self):
         return Cells(self)
 
@@ -140,23 +302,19 @@ class CellsBase(SetBase):
 
         return self
 
-    @property
+    @cached_property_on_version
     def internal(self):
-        return Cells((
-            cell
-            for cell in self
-            if cell.is_internal
-        ))
+        return self.with_state('cells_internal')
 
-    @property
+    @cached_property_on_version
     def external(self):
-        return self - self.internal
+        return self.with_state('cells_internal', False)
 
-    @property
+    @cached_property_on_version
     def internal_ratio(self):
-        return 1. * len(self.internal) / len(self)
+        return 1. * self.count_with_state('cells_internal') / len(self)
 
-    @property
+    @cached_property_on_version
     def grouped_by_internal_adjacent_cells_ratio(self):
         cells_and_ratios = [
             (cell, cell.adjacent_cells.internal_ratio)
@@ -165,17 +323,17 @@ class CellsBase(SetBase):
 
         ratios = set(ratio for _, ratio in cells_and_ratios)
         by_ratio = {
-            ratio: {
+            ratio: Cells(
                 cell
                 for cell, cell_ratio in cells_and_ratios
                 if cell_ratio == ratio
-            }
+            )
             for ratio in ratios
         }
 
         return by_ratio
 
-    @property
+    @cached_property_on_version
     def border(self):
         neighbours = Cells((
             neighbour
@@ -184,7 +342,7 @@ class CellsBase(SetBase):
         ))
         return neighbours - self
 
-    @property
+    @cached_property_on_version
     def non_splitting(self):
         return Cells((
             cell
@@ -192,7 +350,7 @@ class CellsBase(SetBase):
             if cell.adjacent_cells.internal.are_connected
         ))
 
-    @property
+    @cached_property_on_version
     def are_connected(self):
         a_cell = self.peek()
         connected_cells = a_cell.get_connected_cells_in(self)
@@ -217,17 +375,13 @@ class CellsBase(SetBase):
 
         return self
 
-    @property
+    @cached_property_on_version
     def solved(self):
-        return Cells((
-            cell
-            for cell in self
-            if cell.solved
-        ))
+        return self.with_state('cells_solved')
 
-    @property
+    @cached_property_on_version
     def unsolved(self):
-        return self - self.solved
+        return self.with_state('cells_solved', False)
 
     @property
     def sides(self):
@@ -250,35 +404,34 @@ class Cells(CellsBase, frozenset):
     _frozen = True
 
 
-class Side(object):
-    def __init__(self):
-        self._frozen = False
-        self.cells = MutableCells()
-        self.corners = MutableCorners()
+class Side(Part):
+    __slots__ = ('_cells', '_corners')
+    building_attributes = ('_cells', '_corners')
 
-        self._solved = False
+    def __init__(self, board=None, part_id=None):
+        super(Side, self).__init__(board, part_id)
+        if self.is_building:
+            self._cells = MutableCells()
+            self._corners = MutableCorners()
 
     def __unicode__(self):
         return u'Side %s - %s' % tuple(self.corners)
 
-    def __repr__(self):
-        return u'<%s>' % self
-
-    def __lt__(self, other):
-        return self.key.__lt__(other.key)
-
     def freeze(self):
         self.cells = self.cells.frozen()
         self.corners = self.corners.frozen()
         self._frozen = True
 
+    cells = related_parts('side_cells', '_cells')
+    corners = related_parts('side_corners', '_corners')
+
     @property
     def key(self):
         return tuple(corner.key for corner in self.corners)
 
     @property
     def solved(self):
-        return self._solved
+        return self.state.sides_solved[self.id]
 
     @property
     def solved_is_closed(self):
@@ -289,7 +442,7 @@ class Side(object):
     def solved_is_closed(self, value):
         assert value == self.is_closed, \
             "Solved wrong value for %s: should be %s" % (self, self.is_closed)
-        self._solved = True
+        self.state.set_side_solved(self.id)
 
     def add_cells(self, *cells):
         new_cells = set(cells) - self.cells
@@ -301,9 +454,7 @@ class Side(object):
         self.corners.update(new_corners)
         [corner.add_sides(self) for corner in new_corners]
 
-    @property
-    def neighbours(self):
-        return self.corners.sides - {self}
+    neighbours = related_parts('side_neighbours')
 
     @property
     def closed_neighbours_recursive(self):
@@ -320,11 +471,7 @@ class Side(object):
 
     @property
     def is_closed(self):
-        if len(self.cells) == 1:
-            cell, = self.cells
-            return cell.is_internal
-        cell_1, cell_2 = self.cells
-        return cell_1.is_internal != cell_2.is_internal
+        return self.state.sides_closed[self.id]
 
     @property
     def is_on_edge(self):
@@ -332,6 +479,8 @@ class Side(object):
 
 
 class SidesBase(SetBase):
+    kind = 'sides'
+
     def frozen(self):
         return Sides(self)
 
@@ -341,17 +490,13 @@ class SidesBase(SetBase):
 
         return self
 
-    @property
+    @cached_property_on_version
     def closed(self):
-        return Sides((
-            side
-            for side in self
-            if side.is_closed
-        ))
+        return self.with_state('sides_closed')
 
-    @property
+    @cached_property_on_version
     def open(self):
-        return self - self.closed
+        return self.with_state('sides_closed', False)
 
     @property
     def on_edge(self):
@@ -390,17 +535,13 @@ class SidesBase(SetBase):
 
         return self
 
-    @property
+    @cached_property_on_version
     def solved(self):
-        return Sides((
-            side
-            for side in self
-            if side.solved
-        ))
+        return self.with_state('sides_solved')
 
-    @property
+    @cached_property_on_version
     def unsolved(self):
-        return self - self.solved
+        return self.with_state('sides_solved', False)
 
     @property
     def cells(self):
@@ -427,30 +568,28 @@ class Sides(SidesBase, frozenset):
     _frozen = True
 
 
-class Corner(object):
-    def __init__(self, key):
-        self._frozen = False
-        self.key = key
-        self.sides = MutableSides()
+class Corner(Part):
+    __slots__ = ('key', '_sides')
+    building_attributes = ('_sides',)
 
-        self._solved = False
+    def __init__(self, key, board=None, part_id=None):
+        super(Corner, self).__init__(board, part_id)
+        self.key = key
+        if self.is_building:
+            self._sides = MutableSides()
 
     def __unicode__(self):
         return u'Corner %s' % (self.key,)
 
-    def __repr__(self):
-        return u'<%s>' % self
-
-    def __lt__(self, other):
-        return self.key.__lt__(other.key)
-
     def freeze(self):
         self.sides = self.sides.frozen()
         self._frozen = True
 
+    sides = related_parts('corner_sides', '_sides')
+
     @property
     def solved(self):
-        return self._solved
+        return self.state.corners_solved[self.id]
 
     @property
     def solved_is_used(self):
@@ -461,23 +600,25 @@ class Corner(object):
     def solved_is_used(self, value):
         assert value == self.is_used, \
             "Solved wrong value for %s: should be %s" % (self, self.is_used)
-        self._solved = True
+        self.state.set_corner_solved(self.id)
 
     def add_sides(self, *sides):
         new_sides = set(sides) - self.sides
         self.sides.update(new_sides)
         [side.add_corners(self) for side in new_sides]
 
-    @property
+    @cached_property_on_version
     def is_used(self):
         return bool(self.sides.closed)
 
-    @property
-    def neighbours(self):
-        return self.sides.corners - {self}
+    neighbours = related_parts('corner_neighbours')
+
+    cells = related_parts('corner_cells')
 
 
 class CornersBase(SetBase):
+    kind = 'corners'
+
     def frozen(self):
         return Corners(self)
 
@@ -493,21 +634,21 @@ class CornersBase(SetBase):
 
         return self
 
-    @property
+    @cached_property_on_version
     def solved(self):
-        return Corners((
-            corner
-            for corner in self
-            if corner.solved
-        ))
+        return self.with_state('corners_solved')
 
-    @property
+    @cached_property_on_version
     def unsolved(self):
-        return self - self.solved
+        return self.with_state('corners_solved', False)
 
     @property
     def cells(self):
-        return self.sides.cells
+        return Cells((
+            cell
+            for corner in self
+            for cell in corner.cells
+        ))
 
     @property
     def sides(self):
@@ -2,6 +2,8 @@ import random
 import sys
 
 from slithering.base import puzzle_svg
+from slithering.base import storage
+from slithering.base.generator import GeneratorState
 
 
 class Puzzle(object):
@@ -17,6 +19,8 @@ class Puzzle(object):
             seed = self.get_random_seed()
         self.seed = seed
         self.random = random.Random(self.seed)
+        # Created by the solvers, from the given hints
+        self.constraints = None
 
     @property
     def cells(self):
@@ -30,9 +34,51 @@ class Puzzle(object):
     def corners(self):
         return self.board.corners
 
+    @property
+    def state(self):
+        return self.board.state
+
     @property
     def solved(self):
-        return not self.sides.unsolved
+        return self.board.solved
+
+    def fork(self):
+        """
+        A puzzle on a copy-on-write fork of the board state, that continues
+        from the same random state
+        """
+        puzzle = type(self)(self.board.fork(), seed=self.seed)
+        puzzle.random.setstate(self.random.getstate())
+
+        return puzzle
+
+    def snapshot(self):
+        """
+        Start recording the changes to the cells and sides, and return a
+        snapshot to restore them to
+        """
+        return self.state.snapshot()
+
+    def restore(self, snapshot):
+        """Undo the changes since the snapshot, in time proportional to them"""
+        self.state.restore(snapshot)
+
+    def release(self, snapshot):
+        self.state.release(snapshot)
+
+    def clear_constraints(self):
+        """
+        Forget the constraints that the solvers created, eg after changing the
+        given hints, so that they are created again
+        """
+        self.constraints = None
+
+    def save(self, filename):
+        storage.save_puzzle(self, filename)
+
+    @staticmethod
+    def load(filename):
+        return storage.load_puzzle(filename)
 
     def get_random_seed(self):
         return random.randint(0, sys.maxint)
@@ -52,6 +98,20 @@ class Puzzle(object):
 
         return self
 
+    def create_random_puzzle_steps(self, step_size=1):
+        """
+        Create a random puzzle, and yield it every `step_size` cells that are
+        added, and when it's done. Fork it to keep a snapshot of the step
+        """
+        cells_count = 0
+        for cell in self.create_random_puzzle_cells_sequence():
+            self.add_internal_cell(cell)
+            cells_count += 1
+            if cells_count % step_size == 0:
+                yield self
+        if cells_count % step_size:
+            yield self
+
     def create_random_puzzle_from_cells_sequence(self, cells_sequence):
         cells = []
 
@@ -72,35 +132,31 @@ class Puzzle(object):
         return internal.border.non_splitting
 
     def create_random_puzzle_cells_sequence(self):
+        """
+        Yield random cells to add, until enough of them are internal. The
+        generator state is updated with the cells that have been added, when
+        the next cell is requested
+        """
         target_internal_cells_count = \
             len(self.cells) * self.target_internal_cells_percentage
-
-        yield self.get_random_starting_cell_for_puzzle()
-        while len(self.cells.internal) < target_internal_cells_count:
-            yield self.get_random_cell_for_puzzle()
-
-    def get_random_cell_for_puzzle(self):
-        permissible_cells = self.get_permissible_puzzle_cells()
-        cells_by_ratio = \
-            permissible_cells.grouped_by_internal_adjacent_cells_ratio
-        ratios = sorted(set(cells_by_ratio))
-        minimum_ratio = self.random.random()
-
-        passing_ratios = [
-            ratio
-            for ratio in ratios
-            if ratio >= minimum_ratio
-        ]
-
-        if not passing_ratios:
-            ratio = ratios[0]
-        else:
-            ratio = passing_ratios[0]
-
-        ratio_cells = cells_by_ratio[ratio]
-        cell = self.random.choice(sorted(ratio_cells))
-
-        return cell
+        generator_state = GeneratorState(self.board)
+
+        cell = self.get_random_starting_cell_for_puzzle()
+        while True:
+            yield cell
+            if cell.is_internal:
+                generator_state.add_internal_cell(cell.id)
+            if generator_state.internal_count \
+                    >= target_internal_cells_count:
+                break
+            cell = self.get_random_cell_for_puzzle(generator_state)
+
+    def get_random_cell_for_puzzle(self, generator_state=None):
+        if generator_state is None:
+            generator_state = GeneratorState(self.board)
+        cell_id = generator_state.get_random_cell_id(self.random)
+
+        return self.board.cells_by_id[cell_id]
 
     def get_random_starting_cell_for_puzzle(self):
         return self.get_random_cell()
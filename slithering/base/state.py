@@ -0,0 +1,140 @@
+import copy
+
+from slithering.base.bitset import Bitset
+from slithering.utils import VersionCache
+
+
+class BoardState(object):
+    """
+    The mutable state of the parts of a board, as one bitset per attribute,
+    indexed by part id.
+    `sides_closed` is derived from `cells_internal`: making a cell internal, or
+    external, flips all its sides.
+    Every change bumps `version`, which invalidates the values in `cache`.
+    A forked state shares the bitsets with its parent, until either of them
+    changes them.
+    While there is a snapshot, every change is recorded in the `trail`, so
+    that restoring the snapshot takes time proportional to the changes since
+    it was taken
+    """
+    bitset_names = (
+        'cells_internal',
+        'cells_solved',
+        'cells_hint_given',
+        'sides_closed',
+        'sides_solved',
+        'corners_solved',
+    )
+
+    def __init__(self, topology):
+        self.topology = topology
+        self.version = 0
+
+        self.cells_internal = Bitset(topology.cells_count)
+        self.cells_solved = Bitset(topology.cells_count)
+        self.cells_hint_given = Bitset(topology.cells_count, True)
+        self.sides_closed = Bitset(topology.sides_count)
+        self.sides_solved = Bitset(topology.sides_count)
+        self.corners_solved = Bitset(topology.corners_count)
+
+        self.cache = VersionCache(self)
+        self.trail = None
+        self.snapshots_count = 0
+
+    def fork(self):
+        for bitset_name in self.bitset_names:
+            getattr(self, bitset_name).shared = True
+
+        state = copy.copy(self)
+        state.cache = VersionCache(state)
+        state.trail = None
+        state.snapshots_count = 0
+
+        return state
+
+    def snapshot(self):
+        """Start recording changes, and return a marker to restore them to"""
+        if self.trail is None:
+            self.trail = []
+        self.snapshots_count += 1
+
+        return len(self.trail)
+
+    def restore(self, snapshot):
+        """Undo all the changes since the snapshot was taken"""
+        trail = self.trail
+        assert trail is not None and snapshot <= len(trail), \
+            "Snapshot %s is not in the trail" % snapshot
+        if len(trail) == snapshot:
+            return
+
+        while len(trail) > snapshot:
+            bitset_name, index, value = trail.pop()
+            if bitset_name == 'cells_internal':
+                self._set_cell_internal(index, value)
+            else:
+                self.get_writable(bitset_name)[index] = value
+        self.version += 1
+
+    def release(self, snapshot):
+        """
+        Forget a snapshot. Changes stop being recorded once there are no
+        snapshots left
+        """
+        assert self.snapshots_count > 0, "There are no snapshots to release"
+        self.snapshots_count -= 1
+        if not self.snapshots_count:
+            self.trail = None
+
+    def record(self, bitset_name, index):
+        if self.trail is not None:
+            self.trail.append(
+                (bitset_name, index, getattr(self, bitset_name)[index]))
+
+    def clear_solved(self):
+        """Forget everything that was solved, but not the puzzle itself"""
+        for bitset_name in ('cells_solved', 'sides_solved', 'corners_solved'):
+            for index in getattr(self, bitset_name).iter_ids():
+                self.set_bit(bitset_name, index, False)
+
+    def get_writable(self, bitset_name):
+        bitset = getattr(self, bitset_name)
+        if bitset.shared:
+            bitset = bitset.copy()
+            setattr(self, bitset_name, bitset)
+
+        return bitset
+
+    def set_cell_internal(self, cell_id, is_internal):
+        if self.cells_internal[cell_id] == is_internal:
+            return
+
+        self.record('cells_internal', cell_id)
+        self._set_cell_internal(cell_id, is_internal)
+        self.version += 1
+
+    def _set_cell_internal(self, cell_id, is_internal):
+        self.get_writable('cells_internal')[cell_id] = is_internal
+        sides_closed = self.get_writable('sides_closed')
+        for side_id in self.topology.cell_sides[cell_id]:
+            sides_closed.flip(side_id)
+
+    def set_cell_hint_given(self, cell_id, hint_is_given):
+        self.set_bit('cells_hint_given', cell_id, hint_is_given)
+
+    def set_cell_solved(self, cell_id):
+        self.set_bit('cells_solved', cell_id, True)
+
+    def set_side_solved(self, side_id):
+        self.set_bit('sides_solved', side_id, True)
+
+    def set_corner_solved(self, corner_id):
+        self.set_bit('corners_solved', corner_id, True)
+
+    def set_bit(self, bitset_name, index, value):
+        if getattr(self, bitset_name)[index] == value:
+            return
+
+        self.record(bitset_name, index)
+        self.get_writable(bitset_name)[index] = value
+        self.version += 1
@@ -0,0 +1,251 @@
+"""
+A versioned binary file format for boards and puzzles.
+
+A file starts with a fixed header (magic, format version, and the length of
+the metadata), followed by the metadata as JSON, and then by the sections,
+aligned to 8 bytes:
+
+* the topology: the flattened cell and corner keys, and the offsets and
+  targets of the `cell_sides` and `side_corners` relations, as native `long`s
+* the state: one packed bitset per `BoardState` attribute
+
+Loading maps the file in memory, and the topology arrays are read in place,
+only when they are first used, so that opening even a large puzzle takes
+milliseconds, and processes that load the same file share its pages.
+"""
+import array
+import ctypes
+import importlib
+import itertools
+import json
+import mmap
+import os
+import struct
+import sys
+
+from slithering.base.bitset import Bitset
+from slithering.base.state import BoardState
+from slithering.base.topology import Relation, Topology
+from slithering.utils import cached_property
+
+MAGIC = 'SLTH'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHI')
+ALIGNMENT = 8
+
+ITEM_TYPE = ctypes.c_long
+ITEM_SIZE = ctypes.sizeof(ITEM_TYPE)
+
+RELATION_NAMES = ('cell_sides', 'side_corners')
+
+
+class StorageError(Exception):
+    pass
+
+
+def get_class_path(cls):
+    return '%s.%s' % (cls.__module__, cls.__name__)
+
+
+def get_class_from_path(class_path):
+    module_name, class_name = class_path.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def get_aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def get_key_length(keys):
+    key_lengths = {len(key) for key in keys}
+    if len(key_lengths) > 1:
+        raise StorageError("Keys have different lengths: %s" % key_lengths)
+
+    return key_lengths.pop() if key_lengths else 0
+
+
+def get_topology_sections(topology):
+    """The topology arrays, by section name"""
+    sections = [
+        ('cell_keys', itertools.chain.from_iterable(topology.cell_keys)),
+        ('corner_keys', itertools.chain.from_iterable(topology.corner_keys)),
+    ]
+    for relation_name in RELATION_NAMES:
+        relation = topology.relation(relation_name)
+        sections.extend([
+            ('%s_offsets' % relation_name, relation.offsets),
+            ('%s_targets' % relation_name, relation.targets),
+        ])
+
+    return [
+        (name, array.array(Relation.typecode, items).tostring())
+        for name, items in sections
+    ]
+
+
+def get_state_sections(state):
+    return [
+        (bitset_name, str(getattr(state, bitset_name).data))
+        for bitset_name in BoardState.bitset_names
+    ]
+
+
+def save_board(board, filename, extra_metadata=None):
+    topology = board.topology
+    metadata = {
+        'board_class': get_class_path(type(board)),
+        'shape_kwargs': board.get_shape_kwargs(),
+        'counts': [
+            topology.cells_count,
+            topology.sides_count,
+            topology.corners_count,
+        ],
+        'cell_key_length': get_key_length(topology.cell_keys),
+        'corner_key_length': get_key_length(topology.corner_keys),
+        'item_size': ITEM_SIZE,
+        'byte_order': sys.byteorder,
+    }
+    metadata.update(extra_metadata or {})
+
+    sections = get_topology_sections(topology) + get_state_sections(
+        board.state)
+    # The header and metadata are written after the offsets are known
+    offset = 0
+    section_offsets = {}
+    for name, data in sections:
+        section_offsets[name] = [offset, len(data)]
+        offset = get_aligned(offset + len(data))
+    metadata['sections'] = section_offsets
+    encoded_metadata = json.dumps(metadata, sort_keys=True)
+    data_offset = get_aligned(HEADER.size + len(encoded_metadata))
+
+    with open(filename, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(encoded_metadata)))
+        f.write(encoded_metadata)
+        for name, data in sections:
+            f.seek(data_offset + section_offsets[name][0])
+            f.write(data)
+        f.truncate(data_offset + offset)
+
+
+def save_puzzle(puzzle, filename):
+    save_board(puzzle.board, filename, {
+        'puzzle_class': get_class_path(type(puzzle)),
+        'seed': puzzle.seed,
+    })
+
+
+class MappedFile(object):
+    """A board file, mapped in memory, with its header parsed"""
+    def __init__(self, filename):
+        with open(filename, 'rb') as f:
+            # An empty file can't be mapped
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise StorageError("%s is not a board file" % filename)
+            # A private mapping is writable, which `ctypes` needs to read
+            # it in place, but it's never written to
+            self.buffer = mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        magic, format_version, metadata_length = \
+            HEADER.unpack_from(self.buffer)
+        if magic != MAGIC:
+            raise StorageError("%s is not a board file" % filename)
+        if format_version != FORMAT_VERSION:
+            raise StorageError(
+                "%s has format version %s, but only %s is supported"
+                % (filename, format_version, FORMAT_VERSION))
+        self.metadata = json.loads(
+            self.buffer[HEADER.size:HEADER.size + metadata_length])
+        if self.metadata['item_size'] != ITEM_SIZE \
+                or self.metadata['byte_order'] != sys.byteorder:
+            raise StorageError(
+                "%s was saved on a platform with different integers"
+                % filename)
+        self.data_offset = get_aligned(HEADER.size + metadata_length)
+
+    def get_section_bytes(self, name):
+        offset, length = self.metadata['sections'][name]
+        start = self.data_offset + offset
+        return self.buffer[start:start + length]
+
+    def get_section_array(self, name):
+        """The items of a section, read in place"""
+        offset, length = self.metadata['sections'][name]
+        return (ITEM_TYPE * (length // ITEM_SIZE)).from_buffer(
+            self.buffer, self.data_offset + offset)
+
+
+class MappedTopology(Topology):
+    """A topology that reads its arrays from a mapped file, when needed"""
+    def __init__(self, mapped_file):
+        self.mapped_file = mapped_file
+        self.cells_count, self.sides_count, self.corners_count = \
+            mapped_file.metadata['counts']
+
+    def get_keys(self, section_name, key_length):
+        items = iter(self.mapped_file.get_section_array(section_name))
+        return tuple(itertools.izip(*[items] * key_length))
+
+    @cached_property
+    def cell_keys(self):
+        return self.get_keys(
+            'cell_keys', self.mapped_file.metadata['cell_key_length'])
+
+    @cached_property
+    def corner_keys(self):
+        return self.get_keys(
+            'corner_keys', self.mapped_file.metadata['corner_key_length'])
+
+    def get_relation(self, relation_name):
+        return Relation(
+            self.mapped_file.get_section_array('%s_offsets' % relation_name),
+            self.mapped_file.get_section_array('%s_targets' % relation_name),
+        )
+
+    @cached_property
+    def cell_sides(self):
+        return self.get_relation('cell_sides')
+
+    @cached_property
+    def side_corners(self):
+        return self.get_relation('side_corners')
+
+
+def load_state(mapped_file, topology):
+    state = BoardState(topology)
+    for bitset_name in BoardState.bitset_names:
+        bitset = Bitset(len(getattr(state, bitset_name)))
+        bitset.data = bytearray(mapped_file.get_section_bytes(bitset_name))
+        setattr(state, bitset_name, bitset)
+
+    return state
+
+
+def load_board_from_mapped_file(mapped_file):
+    metadata = mapped_file.metadata
+    board_class = get_class_from_path(metadata['board_class'])
+    topology = MappedTopology(mapped_file)
+    shape_kwargs = {
+        str(name): value
+        for name, value in metadata['shape_kwargs'].iteritems()
+    }
+
+    return board_class(
+        state=load_state(mapped_file, topology), topology=topology,
+        **shape_kwargs)
+
+
+def load_board(filename):
+    return load_board_from_mapped_file(MappedFile(filename))
+
+
+def load_puzzle(filename):
+    mapped_file = MappedFile(filename)
+    metadata = mapped_file.metadata
+    if 'puzzle_class' not in metadata:
+        raise StorageError("%s has a board, not a puzzle" % filename)
+    puzzle_class = get_class_from_path(metadata['puzzle_class'])
+
+    return puzzle_class(
+        load_board_from_mapped_file(mapped_file), seed=metadata['seed'])
@@ -0,0 +1,189 @@
+import array
+
+from slithering.utils import cached_property
+
+
+class Relation(object):
+    """
+    A compressed (CSR) adjacency list: the targets of item `index` are
+    `targets[offsets[index]:offsets[index + 1]]`
+    """
+    typecode = 'l'
+
+    def __init__(self, offsets, targets):
+        self.offsets = offsets
+        self.targets = targets
+
+    @classmethod
+    def from_lists(cls, lists):
+        offsets = array.array(cls.typecode, [0])
+        targets = array.array(cls.typecode)
+        for items in lists:
+            targets.extend(items)
+            offsets.append(len(targets))
+
+        return cls(offsets, targets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return self.targets[self.offsets[index]:self.offsets[index + 1]]
+
+    def __iter__(self):
+        return (
+            self[index]
+            for index in xrange(len(self))
+        )
+
+    def degree(self, index):
+        return self.offsets[index + 1] - self.offsets[index]
+
+    def inverted(self, count):
+        """The relation from the targets back to the items"""
+        lists = [[] for _ in xrange(count)]
+        for index, targets in enumerate(self):
+            for target in targets:
+                lists[target].append(index)
+
+        return type(self).from_lists(lists)
+
+    def composed(self, other, excluding_self=False):
+        """
+        The relation from the items to the targets of their targets, in
+        `other`
+        """
+        lists = []
+        for index, targets in enumerate(self):
+            composed_targets = {
+                composed_target
+                for target in targets
+                for composed_target in other[target]
+            }
+            if excluding_self:
+                composed_targets.discard(index)
+            lists.append(sorted(composed_targets))
+
+        return type(self).from_lists(lists)
+
+    @classmethod
+    def regular(cls, targets, degree):
+        """A relation where all items have the same number of targets"""
+        offsets = array.array(
+            cls.typecode, xrange(0, len(targets) + 1, degree))
+
+        return cls(offsets, targets)
+
+
+class Topology(object):
+    """
+    The shape of a board, with cells, sides and corners replaced by dense
+    integer ids, and their adjacency stored in flat `Relation`s.
+    Only `cell_sides` and `side_corners` are needed to create it, and the rest
+    of the relations are derived from them when they are first used
+    """
+    relation_targets = {
+        'cell_sides': 'sides',
+        'cell_corners': 'corners',
+        'cell_neighbours': 'cells',
+        'cell_adjacent_cells': 'cells',
+        'side_cells': 'cells',
+        'side_corners': 'corners',
+        'side_neighbours': 'sides',
+        'corner_sides': 'sides',
+        'corner_cells': 'cells',
+        'corner_neighbours': 'corners',
+    }
+
+    def __init__(self, cell_keys, corner_keys, cell_sides, side_corners):
+        self.cell_keys = tuple(cell_keys)
+        self.corner_keys = tuple(corner_keys)
+
+        self.cells_count = len(self.cell_keys)
+        self.sides_count = len(side_corners)
+        self.corners_count = len(self.corner_keys)
+
+        self.cell_sides = cell_sides
+        self.side_corners = side_corners
+
+    @cached_property
+    def side_cells(self):
+        return self.cell_sides.inverted(self.sides_count)
+
+    @cached_property
+    def corner_sides(self):
+        return self.side_corners.inverted(self.corners_count)
+
+    @cached_property
+    def cell_corners(self):
+        return self.cell_sides.composed(self.side_corners)
+
+    @cached_property
+    def corner_cells(self):
+        return self.corner_sides.composed(self.side_cells)
+
+    @cached_property
+    def cell_neighbours(self):
+        return self.cell_sides.composed(self.side_cells, excluding_self=True)
+
+    @cached_property
+    def cell_adjacent_cells(self):
+        return self.cell_corners.composed(
+            self.corner_cells, excluding_self=True)
+
+    @cached_property
+    def side_neighbours(self):
+        return self.side_corners.composed(
+            self.corner_sides, excluding_self=True)
+
+    @cached_property
+    def corner_neighbours(self):
+        return self.corner_sides.composed(
+            self.side_corners, excluding_self=True)
+
+    def relation(self, name):
+        return getattr(self, name)
+
+    @classmethod
+    def from_cells(cls, cells):
+        """
+        Create the topology of already linked parts: cells and corners are
+        ordered by key, and sides by their corners
+        """
+        cells = sorted(cells)
+        corners = sorted({
+            corner
+            for cell in cells
+            for side in cell.sides
+            for corner in side.corners
+        })
+        corner_ids = {
+            corner: corner_id
+            for corner_id, corner in enumerate(corners)
+        }
+        sides = sorted({
+            side
+            for cell in cells
+            for side in cell.sides
+        }, key=lambda side: sorted(corner_ids[corner]
+                                   for corner in side.corners))
+        side_ids = {
+            side: side_id
+            for side_id, side in enumerate(sides)
+        }
+
+        cell_sides = Relation.from_lists(
+            sorted(side_ids[side] for side in cell.sides)
+            for cell in cells
+        )
+        side_corners = Relation.from_lists(
+            sorted(corner_ids[corner] for corner in side.corners)
+            for side in sides
+        )
+
+        return cls(
+            (cell.key for cell in cells),
+            (corner.key for corner in corners),
+            cell_sides,
+            side_corners,
+        )
@@ -0,0 +1,116 @@
+import array
+import copy
+
+
+class UnionFind(object):
+    """
+    Disjoint sets of ids, that can be merged and looked up in nearly constant
+    time, with union by size and path halving
+    """
+    def __init__(self, size):
+        self.parents = array.array('l', xrange(size))
+        self.sizes = array.array('l', [1]) * size
+
+    def fork(self):
+        """A copy that can be merged separately"""
+        union_find = copy.copy(self)
+        union_find.parents = self.parents[:]
+        union_find.sizes = self.sizes[:]
+
+        return union_find
+
+    def find(self, item_id):
+        """The root of the set of the item"""
+        parents = self.parents
+        parent_id = parents[item_id]
+        while parent_id != item_id:
+            grandparent_id = parents[parent_id]
+            parents[item_id] = grandparent_id
+            item_id, parent_id = grandparent_id, parents[grandparent_id]
+
+        return item_id
+
+    def union(self, item_id, other_item_id):
+        """Merge the sets of the items, and return the root of the merged one"""
+        root_id, other_root_id = self.find(item_id), self.find(other_item_id)
+        if root_id == other_root_id:
+            return root_id
+
+        sizes = self.sizes
+        if sizes[root_id] < sizes[other_root_id]:
+            root_id, other_root_id = other_root_id, root_id
+        self.parents[other_root_id] = root_id
+        sizes[root_id] += sizes[other_root_id]
+
+        return root_id
+
+
+class ParityUnionFind(UnionFind):
+    """
+    A `UnionFind` that also knows, for the items in the same set, whether
+    they have the same parity, or a different one
+    """
+    def __init__(self, size):
+        super(ParityUnionFind, self).__init__(size)
+        self.parities = array.array('b', [0]) * size
+
+    def fork(self):
+        union_find = super(ParityUnionFind, self).fork()
+        union_find.parities = self.parities[:]
+
+        return union_find
+
+    def find(self, item_id):
+        return self.find_with_parity(item_id)[0]
+
+    def find_with_parity(self, item_id):
+        """The root of the set of the item, and its parity to the root"""
+        parents, parities = self.parents, self.parities
+        path = []
+        while parents[item_id] != item_id:
+            path.append(item_id)
+            item_id = parents[item_id]
+        root_id = item_id
+
+        parity = 0
+        for path_item_id in reversed(path):
+            parity ^= parities[path_item_id]
+            parities[path_item_id] = parity
+            parents[path_item_id] = root_id
+
+        return root_id, parity
+
+    def get_parity(self, item_id, other_item_id):
+        """
+        The parity between two items, or `None` if they are not in the same
+        set
+        """
+        root_id, parity = self.find_with_parity(item_id)
+        other_root_id, other_parity = self.find_with_parity(other_item_id)
+        if root_id != other_root_id:
+            return None
+
+        return parity ^ other_parity
+
+    def union(self, item_id, other_item_id, parity=0):
+        """
+        Merge the sets of the items, so that they have the given parity, and
+        return the root of the merged one
+        """
+        root_id, item_parity = self.find_with_parity(item_id)
+        other_root_id, other_item_parity = self.find_with_parity(other_item_id)
+        root_parity = item_parity ^ other_item_parity ^ parity
+        if root_id == other_root_id:
+            assert not root_parity, \
+                "Items %s and %s can't have a parity of %s" \
+                % (item_id, other_item_id, parity)
+            return root_id
+
+        sizes = self.sizes
+        if sizes[root_id] < sizes[other_root_id]:
+            root_id, other_root_id = other_root_id, root_id
+        self.parents[other_root_id] = root_id
+        self.parities[other_root_id] = root_parity
+        sizes[root_id] += sizes[other_root_id]
+
+        return root_id
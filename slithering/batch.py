@@ -0,0 +1,231 @@
+"""
+Generate batches of random puzzles, in parallel, as JSON lines.
+
+Each puzzle gets its own seed, drawn from a generator seeded with the master
+seed, so a batch is the same no matter how many workers create it.
+
+Usage: python -m slithering.batch square 20 20 1000 --seed 42 --workers 4 \
+    --output puzzles.jsonl
+"""
+import argparse
+import binascii
+import collections
+import itertools
+import json
+import multiprocessing
+import random
+import sys
+
+from slithering.base.bitset import bytes_to_mask
+from slithering.hexagonal.board import HexagonalBoard
+from slithering.hexagonal.puzzle import HexagonalPuzzle
+from slithering.square.board import SquareBoard
+from slithering.square.puzzle import SquarePuzzle
+
+SHAPES = {
+    'square': (SquareBoard, SquarePuzzle),
+    'hexagonal': (HexagonalBoard, HexagonalPuzzle),
+}
+
+
+def iter_puzzle_seeds(master_seed):
+    """The seeds of the puzzles, drawn like `Puzzle.get_random_seed` does"""
+    seeds_random = random.Random(master_seed)
+    while True:
+        yield seeds_random.randint(0, sys.maxint)
+
+
+def get_puzzle_seeds(master_seed, count):
+    return list(itertools.islice(iter_puzzle_seeds(master_seed), count))
+
+
+def create_puzzle(shape, width, height, seed):
+    board_class, puzzle_class = SHAPES[shape]
+    puzzle = puzzle_class(board_class(width, height), seed=seed)
+    puzzle.create_random_puzzle()
+
+    return puzzle
+
+
+def create_puzzle_record(task):
+    """
+    Create a puzzle, and describe it with its internal cells, as the hex of
+    the bitset of cells by id
+    """
+    shape, width, height, index, seed = task
+    puzzle = create_puzzle(shape, width, height, seed)
+
+    return {
+        'index': index,
+        'seed': seed,
+        'shape': shape,
+        'width': width,
+        'height': height,
+        'internal_cells': binascii.hexlify(puzzle.state.cells_internal.data),
+    }
+
+
+def create_puzzle_from_record(record):
+    board_class, puzzle_class = SHAPES[record['shape']]
+    puzzle = puzzle_class(
+        board_class(record['width'], record['height']), seed=record['seed'])
+    internal_cells_mask = \
+        bytes_to_mask(binascii.unhexlify(record['internal_cells']))
+    puzzle.board.get_parts_from_mask('cells', internal_cells_mask).set(True)
+
+    return puzzle
+
+
+class PuzzleStream(object):
+    """
+    An iterator of puzzle records, that are created on demand, in order.
+    With workers, up to `buffer_size` puzzles are created in the background,
+    and the buffer is topped up whenever a puzzle is taken from it, so that
+    the next one is usually ready, without creating more than needed.
+    The workers are only started when the first puzzle is asked for, and
+    they are stopped when the stream is closed, or when it ends.
+    Without a `count`, the stream never ends
+    """
+    def __init__(self, shape, width, height, master_seed, count=None,
+                 buffer_size=4, workers=None):
+        if shape not in SHAPES:
+            raise ValueError("Unknown shape '%s', expected one of %s"
+                             % (shape, ', '.join(sorted(SHAPES))))
+        assert buffer_size >= 1, "Buffer size must be positive"
+        seeds = iter_puzzle_seeds(master_seed)
+        if count is not None:
+            seeds = itertools.islice(seeds, count)
+        self.tasks = (
+            (shape, width, height, index, seed)
+            for index, seed in enumerate(seeds)
+        )
+        self.buffer_size = buffer_size
+        self.pending = collections.deque()
+        self.workers = workers
+        self.pool = None
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self):
+        if self.pool is None and self.workers != 1:
+            self.pool = multiprocessing.Pool(self.workers)
+
+    def fill(self):
+        if self.pool is None:
+            return
+        for task in itertools.islice(
+                self.tasks, self.buffer_size - len(self.pending)):
+            self.pending.append(
+                self.pool.apply_async(create_puzzle_record, (task,)))
+
+    def next(self):
+        if self.closed:
+            raise StopIteration()
+        self.start()
+        self.fill()
+        if self.pending:
+            record = self.pending.popleft().get()
+        else:
+            # With workers, the buffer is only empty when the tasks ran out
+            task = next(self.tasks, None)
+            if task is None:
+                self.close()
+                raise StopIteration()
+            record = create_puzzle_record(task)
+        self.fill()
+
+        return record
+
+    def close(self):
+        self.closed = True
+        self.pending.clear()
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        self.tasks = iter(())
+
+
+def generate_puzzle_records(shape, width, height, count, master_seed,
+                            workers=None, buffer_size=None):
+    """
+    Yield the records of a batch of puzzles, in order, as soon as they are
+    created. With more than one worker, they are created in a process pool
+    """
+    if buffer_size is None:
+        buffer_size = 4 * (workers or multiprocessing.cpu_count())
+    with PuzzleStream(shape, width, height, master_seed, count=count,
+                      buffer_size=buffer_size, workers=workers) as stream:
+        for record in stream:
+            yield record
+
+
+def generate_growth_records(shape, width, height, seed, step_size=1):
+    """
+    Yield the records of a puzzle as it's being created, every `step_size`
+    internal cells, and when it's done
+    """
+    board_class, puzzle_class = SHAPES[shape]
+    puzzle = puzzle_class(board_class(width, height), seed=seed)
+    for step, _ in enumerate(puzzle.create_random_puzzle_steps(step_size)):
+        yield {
+            'step': step,
+            'seed': seed,
+            'shape': shape,
+            'width': width,
+            'height': height,
+            'internal_cells':
+                binascii.hexlify(puzzle.state.cells_internal.data),
+        }
+
+
+def write_puzzle_records(records, output):
+    for record in records:
+        output.write(json.dumps(record, sort_keys=True))
+        output.write('\n')
+        output.flush()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description="Generate a batch of random puzzles, as JSON lines")
+    parser.add_argument('shape', choices=sorted(SHAPES))
+    parser.add_argument('width', type=int)
+    parser.add_argument('height', type=int)
+    parser.add_argument('count', type=int)
+    parser.add_argument('--seed', type=int, default=None,
+                        help="The master seed (default: random)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="The number of processes (default: CPU count)")
+    parser.add_argument('--buffer-size', type=int, default=None,
+                        help="The number of puzzles to create ahead "
+                             "(default: 4 per worker)")
+    parser.add_argument('--output', default=None,
+                        help="The file to write to (default: stdout)")
+    args = parser.parse_args(argv)
+
+    master_seed = args.seed
+    if master_seed is None:
+        master_seed = random.randint(0, sys.maxint)
+        sys.stderr.write('Master seed: %s\n' % master_seed)
+
+    records = generate_puzzle_records(
+        args.shape, args.width, args.height, args.count, master_seed,
+        workers=args.workers, buffer_size=args.buffer_size)
+    if args.output is None:
+        write_puzzle_records(records, sys.stdout)
+    else:
+        with open(args.output, 'w') as output:
+            write_puzzle_records(records, output)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
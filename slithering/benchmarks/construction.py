@@ -0,0 +1,65 @@
+"""
+Report the time it takes to create the topology of boards, comparing the
+arithmetic hexagonal builder with the one that links parts.
+
+The builders that link parts take hundreds of microseconds, and a lot of
+memory, per cell, so they are only measured up to `MAX_PARTS_SIZE`, and
+only the arithmetic builder is measured on bigger boards.
+
+Usage: python -m slithering.benchmarks.construction [size [size ...]]
+"""
+import sys
+import time
+
+from slithering.base.board import Board
+from slithering.hexagonal.board import HexagonalBoard
+from slithering.square.board import SquareBoard
+
+
+class PartsHexagonalBoard(HexagonalBoard):
+    """A hexagonal board, with its topology created by linking parts"""
+    def create_topology(self):
+        return Board.create_topology(self)
+
+
+MAX_PARTS_SIZE = 500
+
+# The board classes, with the biggest size to measure each one at
+BOARD_CLASSES = [
+    (SquareBoard, MAX_PARTS_SIZE),
+    (PartsHexagonalBoard, MAX_PARTS_SIZE),
+    (HexagonalBoard, None),
+]
+
+DEFAULT_SIZES = [10, 100, 500, 1000, 2000]
+
+
+def measure_construction(board_class, size):
+    board_class.clear_topology_cache()
+    start = time.time()
+    board = board_class(size, size)
+    duration = time.time() - start
+    board_class.clear_topology_cache()
+
+    return duration, 1000000. * duration / board.topology.cells_count
+
+
+def main(sizes):
+    print '%-20s %10s %12s %14s' % ('Board', 'Size', 'Seconds', 'us/cell')
+    for board_class, max_size in BOARD_CLASSES:
+        for size in sizes:
+            if max_size is not None and size > max_size:
+                print '%-20s %10s %12s %14s' % (
+                    board_class.__name__, '%sx%s' % (size, size), 'skipped',
+                    '-')
+                continue
+            duration, micro_seconds_per_cell = \
+                measure_construction(board_class, size)
+            print '%-20s %10s %12.3f %14.2f' % (
+                board_class.__name__, '%sx%s' % (size, size), duration,
+                micro_seconds_per_cell)
+            sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main(map(int, sys.argv[1:]) or DEFAULT_SIZES)
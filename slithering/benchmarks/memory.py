@@ -0,0 +1,66 @@
+"""
+Report the memory used by boards, in bytes per cell.
+
+Usage: python -m slithering.benchmarks.memory [size [size ...]]
+"""
+import gc
+import sys
+import types
+
+from slithering.hexagonal.board import HexagonalBoard
+from slithering.square.board import SquareBoard
+
+SKIPPED_TYPES = (
+    type,
+    types.ClassType,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+)
+
+BOARD_CLASSES = [
+    SquareBoard,
+    HexagonalBoard,
+]
+
+DEFAULT_SIZES = [10, 50, 100, 200]
+
+
+def get_deep_size(root):
+    """The total size of an object and everything it references"""
+    seen = set()
+    stack = [root]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, SKIPPED_TYPES):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+
+    return total
+
+
+def measure_board(board_class, size):
+    board = board_class(size, size)
+    # Parts are created lazily, so make sure they are counted
+    board.cells, board.sides, board.corners
+    board_size = get_deep_size(board)
+
+    return board_size, 1. * board_size / len(board.cells)
+
+
+def main(sizes):
+    print '%-16s %6s %14s %14s' % ('Board', 'Size', 'Bytes', 'Bytes/cell')
+    for board_class in BOARD_CLASSES:
+        for size in sizes:
+            board_size, bytes_per_cell = measure_board(board_class, size)
+            print '%-16s %6s %14s %14.1f' % (
+                board_class.__name__, '%sx%s' % (size, size), board_size,
+                bytes_per_cell)
+
+
+if __name__ == '__main__':
+    main(map(int, sys.argv[1:]) or DEFAULT_SIZES)
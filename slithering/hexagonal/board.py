@@ -1,4 +1,7 @@
+import array
+
 from slithering.base import parts
+from slithering.base.topology import Relation, Topology
 from slithering.regular_polygon.board import RegularPolygonBoard
 
 
@@ -9,7 +12,102 @@ class HexagonalBoard(RegularPolygonBoard):
         self.width, self.height = width, height
         super(HexagonalBoard, self).__init__(**kwargs)
 
+    def get_shape_kwargs(self):
+        return {
+            'width': self.width,
+            'height': self.height,
+        }
+
+    @staticmethod
+    def get_corner_position(x, y, corner_index):
+        """
+        The position of a corner of a cell, in a grid where each row of
+        cells shares a row of corners with the next one
+        """
+        x_position = (y % 2) + 2 * x
+        if corner_index <= 2:
+            return x_position + corner_index, y
+        else:
+            return x_position + 5 - corner_index, y + 1
+
+    def create_topology(self):
+        """
+        Compute the topology directly from the offset coordinates, without
+        creating any parts.
+        Corners are numbered by their position, row by row, and are keyed by
+        the first cell they belong to. Sides are numbered by row, with the
+        sides in a row of corners before the sides to the next row
+        """
+        width, height = self.width, self.height
+
+        # The first corner row is only used by the first cells row, and the
+        # last one by the last cells row
+        corner_row_firsts = [0] * height + [(height - 1) % 2]
+        corner_row_counts = \
+            [2 * width + 1] + [2 * width + 2] * (height - 1) + [2 * width + 1]
+        corner_row_starts = []
+        side_row_starts = []
+        corners_count = sides_count = 0
+        for corner_row_count in corner_row_counts:
+            corner_row_starts.append(corners_count)
+            side_row_starts.append(sides_count)
+            corners_count += corner_row_count
+            sides_count += corner_row_count - 1 + width + 1
+        sides_count -= width + 1
+
+        corner_keys = [None] * corners_count
+        cell_sides = array.array(Relation.typecode)
+        for x in xrange(width):
+            for y in xrange(height):
+                top_position = (y % 2) + 2 * x - corner_row_firsts[y]
+                bottom_position = (y % 2) + 2 * x - corner_row_firsts[y + 1]
+
+                top_corner_id = corner_row_starts[y] + top_position
+                bottom_corner_id = corner_row_starts[y + 1] + bottom_position
+                for corner_index, corner_id in enumerate((
+                        top_corner_id, top_corner_id + 1, top_corner_id + 2,
+                        bottom_corner_id + 2, bottom_corner_id + 1,
+                        bottom_corner_id)):
+                    if corner_keys[corner_id] is None:
+                        corner_keys[corner_id] = (x, y, corner_index)
+
+                top_side_id = side_row_starts[y] + top_position
+                vertical_side_id = \
+                    side_row_starts[y] + corner_row_counts[y] - 1 + x
+                bottom_side_id = side_row_starts[y + 1] + bottom_position
+                cell_sides.extend((
+                    top_side_id, top_side_id + 1,
+                    vertical_side_id, vertical_side_id + 1,
+                    bottom_side_id, bottom_side_id + 1,
+                ))
+
+        side_corners = array.array(Relation.typecode)
+        for y, corner_row_count in enumerate(corner_row_counts):
+            corner_row_start = corner_row_starts[y]
+            for corner_id in xrange(
+                    corner_row_start, corner_row_start + corner_row_count - 1):
+                side_corners.extend((corner_id, corner_id + 1))
+            if y == height:
+                continue
+            for x_position in xrange(y % 2, y % 2 + 2 * width + 1, 2):
+                side_corners.extend((
+                    corner_row_start + x_position - corner_row_firsts[y],
+                    corner_row_starts[y + 1] + x_position
+                    - corner_row_firsts[y + 1],
+                ))
+
+        return Topology(
+            ((x, y) for x in xrange(width) for y in xrange(height)),
+            corner_keys,
+            Relation.regular(cell_sides, 6),
+            Relation.regular(side_corners, 2),
+        )
+
     def create_cells(self):
+        """
+        Create linked parts for the board: this is slower than
+        `create_topology`, which doesn't need them
+        """
         corners_by_key = self._create_corners()
         sides_by_key = self._create_sides(corners_by_key)
         cells = self._create_cells(sides_by_key)
@@ -26,25 +124,22 @@ class HexagonalBoard(RegularPolygonBoard):
         for x in xrange(self.width):
             for y in xrange(self.height):
                 cell = cells[(x, y)]
-                for corner_index in xrange(6):
-                    cell.add_sides(*[
-                        sides_by_key[(x, y, side_index)]
-                        for side_index in xrange(6)
-                        ])
-                    assert len(cell.sides) == 6, len(cell.sides)
+                cell.add_sides(*[
+                    sides_by_key[(x, y, side_index)]
+                    for side_index in xrange(6)
+                ])
+                assert len(cell.sides) == 6, len(cell.sides)
 
         return parts.Cells(cells.itervalues())
 
     def _create_corners(self):
-        positions_by_key = {}
-        for x in xrange(self.width):
-            for y in xrange(self.height):
-                positions_by_key[(x, y, 0)] = ((y % 2) + 2 * x, y)
-                positions_by_key[(x, y, 1)] = ((y % 2) + 2 * x + 1, y)
-                positions_by_key[(x, y, 2)] = ((y % 2) + 2 * x + 2, y)
-                positions_by_key[(x, y, 3)] = ((y % 2) + 2 * x + 2, y + 1)
-                positions_by_key[(x, y, 4)] = ((y % 2) + 2 * x + 1, y + 1)
-                positions_by_key[(x, y, 5)] = ((y % 2) + 2 * x, y + 1)
+        positions_by_key = {
+            (x, y, corner_index):
+                self.get_corner_position(x, y, corner_index)
+            for x in xrange(self.width)
+            for y in xrange(self.height)
+            for corner_index in xrange(6)
+        }
 
         a_key_py_position = {
             position: a_key
@@ -95,12 +190,36 @@ class HexagonalBoard(RegularPolygonBoard):
 
         return sides
 
-    def row(self, y):
+    # Odd rows are shifted right, so the axial directions are the same for
+    # all cells
+    AXIAL_DIRECTIONS = [(1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1)]
+
+    @staticmethod
+    def key_to_axial(key):
+        x, y = key
+        return x - (y - (y % 2)) / 2, y
+
+    @staticmethod
+    def axial_to_key(axial):
+        q, r = axial
+        return q + (r - (r % 2)) / 2, r
+
+    def ring(self, key, radius):
+        """The cells at a distance of `radius` steps from a cell"""
+        if radius == 0:
+            return [self.cells[key]]
+
+        q, r = self.key_to_axial(key)
+        direction_q, direction_r = self.AXIAL_DIRECTIONS[4]
+        q, r = q + direction_q * radius, r + direction_r * radius
+        positions = []
+        for direction_q, direction_r in self.AXIAL_DIRECTIONS:
+            for _ in xrange(radius):
+                positions.append(self.axial_to_key((q, r)))
+                q, r = q + direction_q, r + direction_r
+
         return [
-            self.cells[(x, y)]
-            for x in xrange(self.height)
+            self.cells_by_id[x * self.height + y]
+            for x, y in positions
+            if 0 <= x < self.width and 0 <= y < self.height
         ]
-
-    @property
-    def rows(self):
-        return map(self.row, xrange(self.height))
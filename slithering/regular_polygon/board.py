@@ -5,3 +5,19 @@ from slithering.base.board import Board
 class RegularPolygonBoard(Board):
     cell_sides_count = None
     svg_generator_class = puzzle_svg.RegularPolygonPuzzleSVG
+
+    # The cells are created column by column, so the cell at `(x, y)` has the
+    # id `x * height + y`
+    def row(self, y):
+        return list(self.cells_by_id[y::self.height])
+
+    @property
+    def rows(self):
+        return map(self.row, xrange(self.height))
+
+    def column(self, x):
+        return list(self.cells_by_id[x * self.height:(x + 1) * self.height])
+
+    @property
+    def columns(self):
+        return map(self.column, xrange(self.width))
@@ -0,0 +1,150 @@
+import copy
+
+from slithering.base.bitset import iter_mask_ids
+from slithering.base.union_find import ParityUnionFind
+
+
+class CellParitySolver(object):
+    """
+    Find which cells are internal, from the sides that are solved.
+
+    The cells are grouped by a union-find with parity, along with a virtual
+    cell for the outside of the board, which is external. An open side joins
+    its two cells as being the same, and a closed one as being different,
+    and an edge side joins its cell with the outside. Cells that are solved
+    otherwise are joined with the outside as well.
+
+    Once a group is joined with the outside, all its cells are solved at
+    once, along with the sides between them and the other solved cells.
+    Joining two cells that are already in the same group only checks that
+    their parity agrees, in nearly constant time
+    """
+    def __init__(self, puzzle, debug=False):
+        self.puzzle = puzzle
+        self.debug = debug
+        topology = puzzle.board.topology
+        self.side_cells = topology.side_cells
+        self.cell_sides = topology.cell_sides
+        self.outside_id = topology.cells_count
+        self.cells = ParityUnionFind(topology.cells_count + 1)
+        # The cells of each group that is not joined with the outside
+        self.unsolved_ids_by_root = {
+            cell_id: [cell_id]
+            for cell_id in xrange(topology.cells_count)
+        }
+        self.propagated_sides_mask = 0
+        self.propagated_cells_mask = 0
+
+    def fork(self):
+        """A copy that can go on joining separately"""
+        cell_parity_solver = copy.copy(self)
+        cell_parity_solver.cells = self.cells.fork()
+        cell_parity_solver.unsolved_ids_by_root = {
+            root_id: list(unsolved_ids)
+            for root_id, unsolved_ids in self.unsolved_ids_by_root.iteritems()
+        }
+
+        return cell_parity_solver
+
+    def apply(self):
+        state = self.puzzle.state
+        sides_solved_mask = state.sides_solved.mask
+        cells_solved_mask = state.cells_solved.mask
+        newly_solved_sides_mask = \
+            sides_solved_mask & ~self.propagated_sides_mask
+        newly_solved_cells_mask = \
+            cells_solved_mask & ~self.propagated_cells_mask
+
+        resolved_ids = []
+        sides_closed = state.sides_closed
+        for side_id in iter_mask_ids(newly_solved_sides_mask):
+            cell_ids = self.side_cells[side_id]
+            if len(cell_ids) == 1:
+                cell_id, other_cell_id = cell_ids[0], self.outside_id
+            else:
+                cell_id, other_cell_id = cell_ids
+            resolved_ids.extend(
+                self.join(cell_id, other_cell_id, sides_closed[side_id]))
+        cells_internal = state.cells_internal
+        for cell_id in iter_mask_ids(newly_solved_cells_mask):
+            resolved_ids.extend(
+                self.join(cell_id, self.outside_id, cells_internal[cell_id]))
+
+        changed = self.solve_cells(resolved_ids)
+        changed |= self.solve_sides_around(resolved_ids)
+        self.propagated_sides_mask = state.sides_solved.mask
+        self.propagated_cells_mask = state.cells_solved.mask
+
+        if self.debug:
+            print 'Cell parity: %s groups left unsolved, changed: %s' \
+                  % (len(self.unsolved_ids_by_root), changed)
+
+        return changed
+
+    def join(self, cell_id, other_cell_id, is_different):
+        """
+        Join the groups of two cells, and return the cells that were solved by
+        joining them with the outside
+        """
+        root_id = self.cells.find(cell_id)
+        other_root_id = self.cells.find(other_cell_id)
+        merged_root_id = \
+            self.cells.union(cell_id, other_cell_id, int(is_different))
+        if root_id == other_root_id:
+            return ()
+
+        unsolved_ids = self.unsolved_ids_by_root.pop(root_id, None)
+        other_unsolved_ids = self.unsolved_ids_by_root.pop(other_root_id, None)
+        if unsolved_ids is None or other_unsolved_ids is None:
+            # One of them was joined with the outside
+            return unsolved_ids or other_unsolved_ids or ()
+
+        if len(unsolved_ids) < len(other_unsolved_ids):
+            unsolved_ids, other_unsolved_ids = \
+                other_unsolved_ids, unsolved_ids
+        unsolved_ids.extend(other_unsolved_ids)
+        self.unsolved_ids_by_root[merged_root_id] = unsolved_ids
+
+        return ()
+
+    def is_internal(self, cell_id):
+        return bool(self.cells.get_parity(cell_id, self.outside_id))
+
+    def solve_cells(self, cell_ids):
+        changed = False
+        cells_by_id = self.puzzle.board.cells_by_id
+        for cell_id in cell_ids:
+            cell = cells_by_id[cell_id]
+            if cell.solved:
+                continue
+            cell.solved_is_internal = self.is_internal(cell_id)
+            changed = True
+
+        return changed
+
+    def solve_sides_around(self, cell_ids):
+        """Solve the sides between the cells and other solved cells"""
+        changed = False
+        outside_root_id = self.cells.find(self.outside_id)
+        sides_by_id = self.puzzle.board.sides_by_id
+        for cell_id in cell_ids:
+            for side_id in self.cell_sides[cell_id]:
+                side = sides_by_id[side_id]
+                if side.solved:
+                    continue
+                other_cell_ids = [
+                    other_cell_id
+                    for other_cell_id in self.side_cells[side_id]
+                    if other_cell_id != cell_id
+                ]
+                if other_cell_ids:
+                    other_cell_id, = other_cell_ids
+                else:
+                    other_cell_id = self.outside_id
+                if self.cells.find(other_cell_id) != outside_root_id:
+                    continue
+                side.solved_is_closed = \
+                    self.is_internal(cell_id) != self.is_internal(other_cell_id)
+                changed = True
+
+        return changed
@@ -1,40 +1,117 @@
-from collections import namedtuple
+import contextlib
+import time
+from collections import deque, namedtuple
 
 from slithering.solver.sub_solvers import PuzzleSubSolver
+from slithering.utils import Interner
 
 
 class WithPuzzleConstraints(PuzzleSubSolver):
     @property
     def constraints(self):
-        if not hasattr(self.puzzle, 'constraints'):
+        if self.puzzle.constraints is None:
             self.puzzle.constraints = Constraints()
 
         return self.puzzle.constraints
 
 
 class Constraints(set):
+    """
+    A set of constraints, indexed by the sides they mention, that are kept arc
+    consistent: every case of a constraint is compatible with some case of
+    each constraint that it shares sides with. Cases that all agree on some
+    facts are split out, as resolved constraints.
+
+    Consistency is restored with an AC-3 style worklist: a new constraint is
+    revised against the constraints that share sides with it, and whenever a
+    constraint is reduced, only the constraints that share sides with it are
+    revised against it. Constraints are only ever reduced, and never joined,
+    so none of them can have more cases than it started with.
+
+    Facts about sides are propagated with `assign`, and are remembered, so
+    that constraints that are added later are restricted to them.
+
+    The interned constraints that its own changes asked for are counted, to
+    tell how many of them were reused
+    """
     def __init__(self):
         super(Constraints, self).__init__()
         self.by_side = {}
+        self.assigned = {}
+        self.resolved = set()
+        self.worklist = deque()
+        self.revisions_count = 0
+        self.propagation_duration = 0.
+        self.interning_hits = 0
+        self.interning_misses = 0
+
+    def copy(self):
+        """A copy that can be propagated separately"""
+        constraints = Constraints()
+        set.update(constraints, self)
+        constraints.by_side = {
+            side: set(values)
+            for side, values in self.by_side.iteritems()
+            if values
+        }
+        constraints.assigned = dict(self.assigned)
+        constraints.resolved = set(self.resolved)
+        constraints.worklist = deque(self.worklist)
+        constraints.revisions_count = self.revisions_count
+        constraints.propagation_duration = self.propagation_duration
+        constraints.interning_hits = self.interning_hits
+        constraints.interning_misses = self.interning_misses
 
-    def _update(self, values):
-        return (
-            self._add(value)
-            for value in values
-        )
-
-    def _add(self, value):
-        others = self.sharing_sides_with(value)
-        if others:
-            value = value.being_compatible_with(*others)
-            self._reduce_existing(others, value)
-        map(self._add_to_sides, value.simplified())
+        return constraints
 
-        return value
+    @property
+    def revisions_per_second(self):
+        if not self.propagation_duration:
+            return 0.
+        return self.revisions_count / self.propagation_duration
+
+    def get_revisions_report(self):
+        return '%s revisions in %.2fs (%d/s)' % (
+            self.revisions_count, self.propagation_duration,
+            self.revisions_per_second)
+
+    @contextlib.contextmanager
+    def counting_interning(self):
+        hits, misses = Interner.hits, Interner.misses
+        try:
+            yield
+        finally:
+            self.interning_hits += Interner.hits - hits
+            self.interning_misses += Interner.misses - misses
+
+    def get_interning_report(self):
+        total = self.interning_hits + self.interning_misses
+        return '%s of %s interned constraints were reused (%.1f%%)' % (
+            self.interning_hits, total,
+            100. * self.interning_hits / total if total else 0.)
+
+    def _insert(self, value, is_new=True):
+        """
+        Add the simplified pieces of a constraint, and queue them to be
+        revised. Pieces of a constraint that was reduced were already
+        compatible with the others, so only the others need revising
+        """
+        if self.assigned:
+            value = value.restricted_to(self.assigned)
+        for simplified in value.simplified():
+            super(Constraints, self).add(simplified)
+            self._add_to_sides(simplified)
+            self.worklist.append((simplified, is_new))
+
+    def _replace(self, value, reduced):
+        self.remove(value)
+        self._insert(reduced, is_new=False)
 
     def _add_to_sides(self, value):
         for side in value.sides:
             self.by_side.setdefault(side, set()).add(value)
+        if len(value) == 1:
+            self.resolved.add(value)
 
     def sharing_sides_with(self, constraint):
         others = frozenset(
@@ -45,34 +122,48 @@ class Constraints(set):
         )
         return others
 
-    def _reduce_existing(self, others, value):
-        compatible_others = frozenset(
-            simplified
-            for other in others
-            for simplified in other.being_compatible_with(value).simplified()
-        )
-        removed_others = others - compatible_others
-        new_others = compatible_others - others
-        if removed_others:
-            self.difference_update(removed_others)
-        if new_others:
-            self.update(new_others)
-
-    def _difference_update(self, values):
-        for value in values:
-            self._remove(value)
+    def propagate(self):
+        """Revise the constraints in the worklist, until it's empty"""
+        start = time.time()
+        worklist = self.worklist
+        while worklist:
+            value, is_new = worklist.popleft()
+            # It might have been reduced since it was queued
+            if value not in self:
+                continue
+            others = self.sharing_sides_with(value) - {value}
+            if not others:
+                continue
+            if is_new:
+                self.revisions_count += len(others)
+                reduced = value.being_compatible_with(*others)
+                if reduced != value:
+                    self._replace(value, reduced)
+                    continue
+            for other in others:
+                if other not in self:
+                    continue
+                self.revisions_count += 1
+                reduced_other = other.being_compatible_with(value)
+                if reduced_other != other:
+                    self._replace(other, reduced_other)
+        self.propagation_duration += time.time() - start
 
     def _remove(self, value):
         for side in value.sides:
             self.by_side[side].discard(value)
+        self.resolved.discard(value)
 
     def add(self, value):
-        value = self._add(value)
-        super(Constraints, self).add(value)
+        with self.counting_interning():
+            self._insert(value)
+            self.propagate()
 
     def update(self, values):
-        values = self._update(values)
-        super(Constraints, self).update(values)
+        with self.counting_interning():
+            for value in values:
+                self._insert(value)
+            self.propagate()
 
     def remove(self, value):
         super(Constraints, self).remove(value)
@@ -81,7 +172,48 @@ class Constraints(set):
     def difference_update(self, values):
         values = tuple(values)
         super(Constraints, self).difference_update(values)
-        self._difference_update(values)
+        for value in values:
+            self._remove(value)
+
+    def assign(self, facts):
+        """
+        Propagate facts about sides, and return all the facts that were
+        assigned, including the ones that they forced.
+        Only the constraints that mention the side of a fact are visited: the
+        ones that have incompatible cases are restricted to the facts, and
+        the constraints that share sides with them are revised. The resolved
+        constraints that come out of that are removed, and their facts are
+        propagated in turn
+        """
+        with self.counting_interning():
+            queue = deque(facts)
+            assigned_facts = []
+            while queue or self.worklist or self.resolved:
+                if not queue:
+                    if self.worklist:
+                        self.propagate()
+                        continue
+                    resolved_constraint = self.resolved.pop()
+                    self.remove(resolved_constraint)
+                    queue.extend(resolved_constraint.common_facts)
+                    continue
+
+                side, is_closed = queue.popleft()
+                if side in self.assigned:
+                    assert self.assigned[side] == is_closed, \
+                        "Side %s was assigned both %s and %s" \
+                        % (side, self.assigned[side], is_closed)
+                    continue
+                self.assigned[side] = is_closed
+                assigned_facts.append((side, is_closed))
+
+                for constraint in tuple(self.by_side.get(side, ())):
+                    if constraint.agrees_with(side, is_closed):
+                        continue
+                    self.remove(constraint)
+                    self._insert(constraint, is_new=False)
+
+            return assigned_facts
 
 
 class Constraint(frozenset):
@@ -133,6 +265,35 @@ class Constraint(frozenset):
 
         return simplified_constraints
 
+    def agrees_with(self, side, is_closed):
+        """Do all the cases agree with a fact"""
+        return all(
+            case.sides_dict.get(side, is_closed) == is_closed
+            for case in self
+        )
+
+    def restricted_to(self, facts):
+        """The cases that agree with the facts, by side"""
+        sides = [side for side in self.sides if side in facts]
+        if not sides:
+            return self
+        cases = tuple(
+            case
+            for case in self
+            if all(
+                case.sides_dict.get(side, facts[side]) == facts[side]
+                for side in sides
+            )
+        )
+        if len(cases) == len(self):
+            return self
+
+        assert cases, \
+            "Constraint %s is incompatible with the assigned facts" \
+            % str(self)
+
+        return Constraint(cases, source=self.source)
+
     def being_compatible_with(self, *others):
         return Constraint(
             (
@@ -0,0 +1,269 @@
+import time
+from collections import namedtuple
+
+UNKNOWN = -1
+
+
+class SolutionCount(namedtuple('SolutionCount', [
+        'count', 'limit', 'nodes', 'duration'])):
+    @property
+    def is_unique(self):
+        return self.count == 1
+
+    @property
+    def reached_limit(self):
+        return self.count >= self.limit
+
+
+class SolutionCounter(object):
+    """
+    Count the solutions of a puzzle, up to a limit, by a depth first search
+    over the sides, with propagation of:
+
+    * the hints that are given: a cell has exactly as many closed sides
+    * the corners: each one has either 0 or 2 closed sides
+    * the single loop: closed sides form paths, and closing a path into a
+      loop is only allowed if there are no other closed sides, and then all
+      the other sides are open
+
+    The search tries the values of the puzzle's own solution first, so that
+    the first solution is found quickly, and then the same search goes on to
+    look for a second one, undoing assignments from a trail.
+    """
+    def __init__(self, puzzle, limit=2, prefer_known_solution=True):
+        self.puzzle = puzzle
+        self.limit = limit
+        topology = puzzle.board.topology
+        self.sides_count = topology.sides_count
+        self.corners_count = topology.corners_count
+        self.cell_sides = [list(sides) for sides in topology.cell_sides]
+        self.side_cells = [list(cells) for cells in topology.side_cells]
+        self.side_corners = [list(corners) for corners in topology.side_corners]
+        self.corner_sides = [list(sides) for sides in topology.corner_sides]
+
+        state = puzzle.state
+        sides_closed = state.sides_closed
+        self.hints = [
+            sum(1 for side_id in sides if sides_closed[side_id])
+            if state.cells_hint_given[cell_id] else None
+            for cell_id, sides in enumerate(self.cell_sides)
+        ]
+        if prefer_known_solution:
+            self.preferred_values = [
+                int(sides_closed[side_id])
+                for side_id in xrange(self.sides_count)
+            ]
+        else:
+            self.preferred_values = [1] * self.sides_count
+
+        self.values = [UNKNOWN] * self.sides_count
+        self.cells_closed = [0] * len(self.cell_sides)
+        self.cells_unknown = map(len, self.cell_sides)
+        self.corners_closed = [0] * self.corners_count
+        self.corners_unknown = map(len, self.corner_sides)
+        self.path_ends = range(self.corners_count)
+        self.paths_count = 0
+        self.loops_count = 0
+        self.trail = []
+        self.cells_queue = []
+        self.corners_queue = []
+        self.nodes = 0
+
+    def count(self):
+        start = time.time()
+        count = 0
+        consistent = self.propagate_initial()
+        stack = []
+        while True:
+            if consistent:
+                if self.loops_count:
+                    count += 1
+                    if count >= self.limit:
+                        break
+                    consistent = False
+                    continue
+                side_id = self.choose_side()
+                if side_id is None:
+                    consistent = False
+                    continue
+                self.nodes += 1
+                value = self.preferred_values[side_id]
+                stack.append((len(self.trail), side_id, 1 - value))
+                consistent = self.assign_and_propagate(side_id, value)
+            else:
+                if not stack:
+                    break
+                trail_length, side_id, value = stack.pop()
+                self.undo(trail_length)
+                consistent = self.assign_and_propagate(side_id, value)
+
+        return SolutionCount(
+            count=count, limit=self.limit, nodes=self.nodes,
+            duration=time.time() - start)
+
+    def choose_side(self):
+        """
+        Prefer continuing a path, since the corner at its end has at most
+        two choices, or else the first unknown side
+        """
+        corners_closed, corners_unknown = \
+            self.corners_closed, self.corners_unknown
+        values = self.values
+        for corner_id in xrange(self.corners_count):
+            if corners_closed[corner_id] == 1 and corners_unknown[corner_id]:
+                for side_id in self.corner_sides[corner_id]:
+                    if values[side_id] == UNKNOWN:
+                        return side_id
+        for side_id in xrange(self.sides_count):
+            if values[side_id] == UNKNOWN:
+                return side_id
+
+        return None
+
+    def propagate_initial(self):
+        self.cells_queue.extend(
+            cell_id
+            for cell_id, hint in enumerate(self.hints)
+            if hint is not None
+        )
+        self.corners_queue.extend(xrange(self.corners_count))
+
+        return self.propagate()
+
+    def assign_and_propagate(self, side_id, value):
+        return self.assign(side_id, value) and self.propagate()
+
+    def assign(self, side_id, value):
+        """Set the value of a side, and return if it's still consistent"""
+        if self.values[side_id] != UNKNOWN:
+            return self.values[side_id] == value
+        self.trail.append(('side', side_id))
+        self.values[side_id] = value
+        for corner_id in self.side_corners[side_id]:
+            self.corners_unknown[corner_id] -= 1
+            self.corners_closed[corner_id] += value
+            self.corners_queue.append(corner_id)
+        for cell_id in self.side_cells[side_id]:
+            self.cells_unknown[cell_id] -= 1
+            self.cells_closed[cell_id] += value
+            self.cells_queue.append(cell_id)
+
+        if value:
+            return self.close_path(*self.side_corners[side_id])
+
+        return True
+
+    def close_path(self, corner_id, other_corner_id):
+        """Update the paths with a side that was closed"""
+        corners_closed = self.corners_closed
+        if corners_closed[corner_id] > 2 or corners_closed[other_corner_id] > 2:
+            return False
+        self.trail.append(('counts', self.paths_count, self.loops_count))
+        path_ends = self.path_ends
+        end_id = path_ends[corner_id]
+        other_end_id = path_ends[other_corner_id]
+        if end_id == other_corner_id and corners_closed[corner_id] == 2:
+            # The path is closed into a loop: it has to be the only one
+            self.paths_count -= 1
+            self.loops_count += 1
+            return not self.paths_count and self.loops_count == 1
+
+        self.set_path_end(end_id, other_end_id)
+        self.set_path_end(other_end_id, end_id)
+        if corners_closed[corner_id] == 1 \
+                and corners_closed[other_corner_id] == 1:
+            self.paths_count += 1
+        elif corners_closed[corner_id] == 2 \
+                and corners_closed[other_corner_id] == 2:
+            self.paths_count -= 1
+
+        return True
+
+    def set_path_end(self, corner_id, end_id):
+        self.trail.append(('end', corner_id, self.path_ends[corner_id]))
+        self.path_ends[corner_id] = end_id
+
+    def propagate(self):
+        cells_queue, corners_queue = self.cells_queue, self.corners_queue
+        values = self.values
+        while cells_queue or corners_queue:
+            while corners_queue:
+                corner_id = corners_queue.pop()
+                closed = self.corners_closed[corner_id]
+                unknown = self.corners_unknown[corner_id]
+                if closed > 2 or (closed == 1 and not unknown):
+                    return self.clear_queues()
+                if not unknown:
+                    continue
+                if closed == 2 or (closed == 0 and unknown == 1):
+                    forced_value = 0
+                elif closed == 1 and unknown == 1:
+                    forced_value = 1
+                else:
+                    continue
+                for side_id in self.corner_sides[corner_id]:
+                    if values[side_id] == UNKNOWN:
+                        if not self.assign(side_id, forced_value):
+                            return self.clear_queues()
+            while cells_queue:
+                cell_id = cells_queue.pop()
+                hint = self.hints[cell_id]
+                if hint is None:
+                    continue
+                closed = self.cells_closed[cell_id]
+                unknown = self.cells_unknown[cell_id]
+                if closed > hint or closed + unknown < hint:
+                    return self.clear_queues()
+                if not unknown:
+                    continue
+                if closed == hint:
+                    forced_value = 0
+                elif closed + unknown == hint:
+                    forced_value = 1
+                else:
+                    continue
+                for side_id in self.cell_sides[cell_id]:
+                    if values[side_id] == UNKNOWN:
+                        if not self.assign(side_id, forced_value):
+                            return self.clear_queues()
+
+        if self.loops_count:
+            # The loop is closed, so all the other sides are open
+            for side_id in xrange(self.sides_count):
+                if values[side_id] == UNKNOWN:
+                    if not self.assign(side_id, 0):
+                        return self.clear_queues()
+            if cells_queue or corners_queue:
+                return self.propagate()
+
+        return True
+
+    def clear_queues(self):
+        del self.cells_queue[:]
+        del self.corners_queue[:]
+        return False
+
+    def undo(self, trail_length):
+        trail = self.trail
+        while len(trail) > trail_length:
+            entry = trail.pop()
+            kind = entry[0]
+            if kind == 'side':
+                side_id = entry[1]
+                value = self.values[side_id]
+                self.values[side_id] = UNKNOWN
+                for corner_id in self.side_corners[side_id]:
+                    self.corners_unknown[corner_id] += 1
+                    self.corners_closed[corner_id] -= value
+                for cell_id in self.side_cells[side_id]:
+                    self.cells_unknown[cell_id] += 1
+                    self.cells_closed[cell_id] -= value
+            elif kind == 'end':
+                _, corner_id, end_id = entry
+                self.path_ends[corner_id] = end_id
+            else:
+                _, self.paths_count, self.loops_count = entry
+
+
+def count_solutions(puzzle, limit=2):
+    return SolutionCounter(puzzle, limit=limit).count()
@@ -1,15 +1,19 @@
-import itertools
-
+from slithering.solver.cell_parity_solver import CellParitySolver
 from slithering.solver.constraint_solver import ConstraintSolver
-from slithering.solver.constraints import WithPuzzleConstraints, \
-    Constraint, Case
+from slithering.solver.constraints import WithPuzzleConstraints
+from slithering.solver.degree_solver import DegreeSolver
+from slithering.solver.loop_solver import LoopSolver
+from slithering.solver.sat_constraint_solver import SatConstraintSolver
 from slithering.solver.sub_solvers import PuzzleSubSolver, \
-    CellSubSolver, CornerSubSolver
+    CellSubSolver, CornerSubSolver, TIER_CONSTRAINTS, TIER_SAT
 from slithering.solver.solver import PuzzleSolver
+from slithering.solver.table_constraints import TableConstraint
 
 
 @PuzzleSolver.register_cell_sub_solver_class
 class CellHintSubSolver(WithPuzzleConstraints, CellSubSolver):
+    tier = TIER_CONSTRAINTS
+
     @classmethod
     def is_suitable(cls, puzzle, cell):
         if not cell.hint_is_given:
@@ -31,116 +35,66 @@ class CellHintSubSolver(WithPuzzleConstraints, CellSubSolver):
         return changed
 
     def constraint(self):
-        sides = self.cell.sides
-        combinations = itertools.combinations(sides, self.cell.hint)
-
-        constraint = Constraint((
-            Case((
-                (side, side in combination)
-                for side in sides
-            ), source=u'Hint possibility')
-            for combination in combinations
-        ), source=u'From hint')
+        return TableConstraint.from_closed_counts(
+            self.cell.sides, (self.cell.hint,), source=u'From hint')
 
-        return constraint
 
-
-@PuzzleSolver.register_cell_sub_solver_class
-class CellSolvedEdgeSideSubSolver(CellSubSolver):
-    """An edge side of cell is solved"""
+@PuzzleSolver.register_puzzle_sub_solver_class
+class DegreeSubSolver(PuzzleSubSolver):
+    """Corners have 0 or 2 closed sides, and cells as many as their hint"""
     @classmethod
-    def is_suitable(cls, puzzle, cell):
-        if cell.solved:
-            return False
-
-        if not cell.is_on_edge:
-            return False
-
-        solved_on_edge_sides = cell.sides.solved & cell.sides.on_edge
-        if not any(solved_on_edge_sides):
-            return False
-
+    def is_suitable(cls, puzzle):
         return True
 
-    def apply(self):
-        changed = False
-        self.finished = True
-
-        if self.cell.solved:
-            return changed
+    def __init__(self, puzzle):
+        super(DegreeSubSolver, self).__init__(puzzle)
+        self.degree_solver = DegreeSolver(self.puzzle, debug=True)
 
-        changed = True
+    def fork(self):
+        sub_solver = super(DegreeSubSolver, self).fork()
+        sub_solver.degree_solver = self.degree_solver.fork()
 
-        is_internal = any(
-            side.is_on_edge and side.solved and side.solved_is_closed
-            for side in self.cell.sides
-        )
-        is_external = any(
-            side.is_on_edge and side.solved and not side.solved_is_closed
-            for side in self.cell.sides
-        )
+        return sub_solver
 
-        assert not (is_internal and is_external), \
-            u"Invalid state: a cell should be both internal and external, " \
-            u"based on sides"
+    def apply(self):
+        self.degree_solver.debug = self.debug
+        changed = self.degree_solver.apply()
 
-        self.cell.solved_is_internal = is_internal
+        self.finished = self.puzzle.board.solved
 
         return changed
 
 
-@PuzzleSolver.register_cell_sub_solver_class
-class CellSolvedSideSubSolver(CellSubSolver):
-    """An non-edge side of cell is solved"""
+@PuzzleSolver.register_puzzle_sub_solver_class
+class CellParitySubSolver(PuzzleSubSolver):
+    """A cell is internal if it's across a closed side from an external one"""
     @classmethod
-    def is_suitable(cls, puzzle, cell):
-        if cell.solved:
-            return False
-
-        solved_sides_with_solved_cell = {
-            side
-            for side in cell.sides.solved
-            if any(side.cells.solved)
-        }
-        if not any(solved_sides_with_solved_cell):
-            return False
-
+    def is_suitable(cls, puzzle):
         return True
 
-    def apply(self):
-        changed = False
-        self.finished = True
-
-        if self.cell.solved:
-            return changed
+    def __init__(self, puzzle):
+        super(CellParitySubSolver, self).__init__(puzzle)
+        self.cell_parity_solver = CellParitySolver(self.puzzle, debug=True)
 
-        solved_sides_with_solved_cell = {
-            side
-            for side in self.cell.sides.solved
-            if any(side.cells.solved)
-        }
-        is_internal = False
-        is_external = False
-        for side in solved_sides_with_solved_cell:
-            other_cell, = side.cells.solved - {self.cell}
-            if side.is_closed == other_cell.is_internal:
-                is_external = True
-            else:
-                is_internal = True
+    def fork(self):
+        sub_solver = super(CellParitySubSolver, self).fork()
+        sub_solver.cell_parity_solver = self.cell_parity_solver.fork()
 
-        assert is_internal != is_external, \
-            u"Invalid state: a cell must be either internal and external, " \
-            u"based on sides"
+        return sub_solver
 
-        self.cell.solved_is_internal = is_internal
+    def apply(self):
+        self.cell_parity_solver.debug = self.debug
+        changed = self.cell_parity_solver.apply()
 
-        changed = True
+        self.finished = not self.cell_parity_solver.unsolved_ids_by_root
 
         return changed
 
 
 @PuzzleSolver.register_corner_sub_solver_class
 class CornerConstraints(WithPuzzleConstraints, CornerSubSolver):
+    tier = TIER_CONSTRAINTS
+
     @classmethod
     def is_suitable(cls, puzzle, corner):
         return True
@@ -157,22 +111,15 @@ class CornerConstraints(WithPuzzleConstraints, CornerSubSolver):
         return changed
 
     def constraint(self):
-        constraint = Constraint((
-            Case((
-                (side, False) for side in self.corner.sides
-            ), source=u'Corner solves to unused'),
-        ) + tuple(
-            Case((
-                (side, side in side_pair) for side in self.corner.sides
-            ), source=u'Corner uses sides %s' % str(side_pair))
-            for side_pair in itertools.combinations(self.corner.sides, 2)
-        ), source=u'From corner')
-
-        return constraint
+        # A corner is either unused, or it uses exactly two of its sides
+        return TableConstraint.from_closed_counts(
+            self.corner.sides, (0, 2), source=u'From corner')
 
 
 @PuzzleSolver.register_puzzle_sub_solver_class
 class PuzzleConstraints(WithPuzzleConstraints, PuzzleSubSolver):
+    tier = TIER_CONSTRAINTS
+
     @classmethod
     def is_suitable(cls, puzzle):
         return True
@@ -182,9 +129,75 @@ class PuzzleConstraints(WithPuzzleConstraints, PuzzleSubSolver):
         self.constraint_solver = \
             ConstraintSolver(self.puzzle, debug=True)
 
+    def fork(self):
+        sub_solver = super(PuzzleConstraints, self).fork()
+        sub_solver.constraint_solver = self.constraint_solver.fork()
+
+        return sub_solver
+
     def apply(self):
+        self.constraint_solver.debug = self.debug
         changed = self.constraint_solver.apply()
 
-        self.finished = not self.constraints
+        # Hints that are given later might add more constraints
+        self.finished = self.puzzle.board.solved
+
+        return changed
+
+
+@PuzzleSolver.register_puzzle_sub_solver_class
+class PuzzleSatConstraints(WithPuzzleConstraints, PuzzleSubSolver):
+    """The sides that all the solutions of the constraints agree on"""
+    tier = TIER_SAT
+
+    @classmethod
+    def is_suitable(cls, puzzle):
+        return True
+
+    def __init__(self, puzzle):
+        super(PuzzleSatConstraints, self).__init__(puzzle)
+        self.sat_constraint_solver = \
+            SatConstraintSolver(self.puzzle, debug=True)
+
+    def fork(self):
+        sub_solver = super(PuzzleSatConstraints, self).fork()
+        sub_solver.sat_constraint_solver = self.sat_constraint_solver.fork()
+
+        return sub_solver
+
+    def apply(self):
+        if not self.constraints:
+            return False
+
+        self.sat_constraint_solver.debug = self.debug
+        changed = self.sat_constraint_solver.apply()
+
+        self.finished = self.puzzle.board.solved
+
+        return changed
+
+
+@PuzzleSolver.register_puzzle_sub_solver_class
+class SingleLoopSubSolver(PuzzleSubSolver):
+    """The closed sides form a single loop"""
+    @classmethod
+    def is_suitable(cls, puzzle):
+        return True
+
+    def __init__(self, puzzle):
+        super(SingleLoopSubSolver, self).__init__(puzzle)
+        self.loop_solver = LoopSolver(self.puzzle, debug=True)
+
+    def fork(self):
+        sub_solver = super(SingleLoopSubSolver, self).fork()
+        sub_solver.loop_solver = self.loop_solver.fork()
+
+        return sub_solver
+
+    def apply(self):
+        self.loop_solver.debug = self.debug
+        changed = self.loop_solver.apply()
+
+        self.finished = self.loop_solver.loops_count > 0
 
         return changed
@@ -0,0 +1,147 @@
+import copy
+
+from slithering.base.bitset import iter_mask_ids
+
+
+class DegreeSolver(object):
+    """
+    Solve sides from the number of closed and unknown sides around each
+    corner, and each cell with a given hint:
+
+    * a corner has either 0 or 2 closed sides
+    * a cell has exactly as many closed sides as its hint
+
+    Counts that break those rules mean that the solved sides are wrong, and
+    fail an assertion.
+
+    The counts are updated whenever a side is solved, and only the corners
+    and the cells of that side are checked again, so each assignment costs
+    constant time. When a count reaches its bound, the remaining unknown
+    sides are solved, and checked in turn
+    """
+    def __init__(self, puzzle, debug=False):
+        self.puzzle = puzzle
+        self.debug = debug
+        topology = puzzle.board.topology
+        self.side_cells = topology.side_cells
+        self.side_corners = topology.side_corners
+        self.cell_sides = topology.cell_sides
+        self.corner_sides = topology.corner_sides
+
+        self.hints = [None] * len(self.cell_sides)
+        self.cells_closed = [0] * len(self.cell_sides)
+        self.cells_unknown = map(len, self.cell_sides)
+        self.corners_closed = [0] * len(self.corner_sides)
+        self.corners_unknown = map(len, self.corner_sides)
+
+        self.cells_queue = []
+        self.corners_queue = range(len(self.corner_sides))
+        self.counted_hints_mask = 0
+        self.propagated_sides_mask = 0
+        self.forced_count = 0
+
+    def fork(self):
+        """A copy that can go on counting separately"""
+        degree_solver = copy.copy(self)
+        degree_solver.hints = list(self.hints)
+        degree_solver.cells_closed = list(self.cells_closed)
+        degree_solver.cells_unknown = list(self.cells_unknown)
+        degree_solver.corners_closed = list(self.corners_closed)
+        degree_solver.corners_unknown = list(self.corners_unknown)
+        degree_solver.cells_queue = list(self.cells_queue)
+        degree_solver.corners_queue = list(self.corners_queue)
+
+        return degree_solver
+
+    def apply(self):
+        for cell_id in self.get_newly_given_hint_cell_ids():
+            self.count_hint(cell_id)
+        for side_id in self.get_newly_solved_side_ids():
+            self.count_side(side_id)
+
+        forced_count = self.forced_count
+        self.propagate()
+        changed = self.forced_count > forced_count
+        self.propagated_sides_mask = self.puzzle.state.sides_solved.mask
+
+        if self.debug:
+            print 'Degrees: forced %s sides, changed: %s' \
+                  % (self.forced_count - forced_count, changed)
+
+        return changed
+
+    def get_newly_given_hint_cell_ids(self):
+        """
+        The cells with hints that were given since the last time, which are
+        all of them at first, and any that are given later, eg by the
+        minimiser
+        """
+        cells_hint_given_mask = self.puzzle.state.cells_hint_given.mask
+        newly_given_mask = cells_hint_given_mask & ~self.counted_hints_mask
+        self.counted_hints_mask = cells_hint_given_mask
+
+        return iter_mask_ids(newly_given_mask)
+
+    def count_hint(self, cell_id):
+        sides_closed = self.puzzle.state.sides_closed
+        self.hints[cell_id] = sum(
+            1 for side_id in self.cell_sides[cell_id] if sides_closed[side_id])
+        self.cells_queue.append(cell_id)
+
+    def get_newly_solved_side_ids(self):
+        sides_solved_mask = self.puzzle.state.sides_solved.mask
+        return iter_mask_ids(sides_solved_mask & ~self.propagated_sides_mask)
+
+    def count_side(self, side_id):
+        is_closed = self.puzzle.state.sides_closed[side_id]
+        for corner_id in self.side_corners[side_id]:
+            self.corners_unknown[corner_id] -= 1
+            self.corners_closed[corner_id] += is_closed
+            self.corners_queue.append(corner_id)
+        for cell_id in self.side_cells[side_id]:
+            self.cells_unknown[cell_id] -= 1
+            self.cells_closed[cell_id] += is_closed
+            if self.hints[cell_id] is not None:
+                self.cells_queue.append(cell_id)
+
+    def propagate(self):
+        cells_queue, corners_queue = self.cells_queue, self.corners_queue
+        while cells_queue or corners_queue:
+            while corners_queue:
+                corner_id = corners_queue.pop()
+                unknown = self.corners_unknown[corner_id]
+                closed = self.corners_closed[corner_id]
+                assert closed <= 2 and (closed != 1 or unknown), \
+                    "Corner %s has %s closed and %s unknown sides" \
+                    % (corner_id, closed, unknown)
+                if not unknown:
+                    continue
+                if closed == 2 or (closed == 0 and unknown == 1):
+                    self.force_sides(self.corner_sides[corner_id], False)
+                elif closed == 1 and unknown == 1:
+                    self.force_sides(self.corner_sides[corner_id], True)
+            while cells_queue:
+                cell_id = cells_queue.pop()
+                unknown = self.cells_unknown[cell_id]
+                closed = self.cells_closed[cell_id]
+                hint = self.hints[cell_id]
+                assert closed <= hint <= closed + unknown, \
+                    "Cell %s has %s closed and %s unknown sides, for a " \
+                    "hint of %s" % (cell_id, closed, unknown, hint)
+                if not unknown:
+                    continue
+                if closed == hint:
+                    self.force_sides(self.cell_sides[cell_id], False)
+                elif closed + unknown == hint:
+                    self.force_sides(self.cell_sides[cell_id], True)
+
+    def force_sides(self, side_ids, is_closed):
+        """Solve the unknown sides, and count them"""
+        sides_by_id = self.puzzle.board.sides_by_id
+        for side_id in side_ids:
+            side = sides_by_id[side_id]
+            if side.solved:
+                continue
+            side.solved_is_closed = is_closed
+            self.forced_count += 1
+            self.count_side(side_id)
@@ -0,0 +1,119 @@
+import copy
+
+from slithering.base.bitset import iter_mask_ids
+from slithering.base.union_find import UnionFind
+
+
+class LoopSolver(object):
+    """
+    Enforce that the closed sides form a single loop.
+
+    The closed sides that are solved form paths, that are tracked as sets of
+    corners, along with the two corners at the ends of each path. Solved
+    closed sides are only ever added, so the paths are merged incrementally,
+    in nearly constant time per side.
+
+    A side that connects the two ends of a path would close it into a loop,
+    which is only allowed if it's the only path, so as long as there are
+    other paths, or loops, that side is solved as open. Only the paths whose
+    ends changed need to be checked again
+    """
+    def __init__(self, puzzle, debug=False):
+        self.puzzle = puzzle
+        self.debug = debug
+        topology = puzzle.board.topology
+        self.side_corners = topology.side_corners
+        self.corner_sides = topology.corner_sides
+        self.corners = UnionFind(topology.corners_count)
+        self.ends_by_root = {}
+        self.loops_count = 0
+        self.unchecked_roots = set()
+        self.propagated_sides_mask = 0
+
+    def fork(self):
+        """A copy that can go on adding sides separately"""
+        loop_solver = copy.copy(self)
+        loop_solver.corners = self.corners.fork()
+        loop_solver.ends_by_root = dict(self.ends_by_root)
+        loop_solver.unchecked_roots = set(self.unchecked_roots)
+
+        return loop_solver
+
+    @property
+    def paths_count(self):
+        return len(self.ends_by_root)
+
+    def apply(self):
+        for side_id in self.get_newly_solved_closed_side_ids():
+            self.add_closed_side(side_id)
+
+        changed = self.forbid_closing_sides()
+
+        if self.debug:
+            print 'Loop: %s paths, %s loops, changed: %s' \
+                  % (self.paths_count, self.loops_count, changed)
+
+        return changed
+
+    def get_newly_solved_closed_side_ids(self):
+        state = self.puzzle.state
+        sides_solved_mask = state.sides_solved.mask
+        newly_solved_mask = sides_solved_mask & ~self.propagated_sides_mask
+        self.propagated_sides_mask = sides_solved_mask
+
+        return iter_mask_ids(newly_solved_mask & state.sides_closed.mask)
+
+    def add_closed_side(self, side_id):
+        corner_id, other_corner_id = self.side_corners[side_id]
+        root_id = self.corners.find(corner_id)
+        other_root_id = self.corners.find(other_corner_id)
+        if root_id == other_root_id:
+            del self.ends_by_root[root_id]
+            self.unchecked_roots.discard(root_id)
+            self.loops_count += 1
+            return
+
+        end_id = self.get_other_end(root_id, corner_id)
+        other_end_id = self.get_other_end(other_root_id, other_corner_id)
+        for old_root_id in (root_id, other_root_id):
+            self.ends_by_root.pop(old_root_id, None)
+            self.unchecked_roots.discard(old_root_id)
+        merged_root_id = self.corners.union(root_id, other_root_id)
+        self.ends_by_root[merged_root_id] = (end_id, other_end_id)
+        self.unchecked_roots.add(merged_root_id)
+
+    def get_other_end(self, root_id, corner_id):
+        """The end of the path that doesn't end at the corner"""
+        ends = self.ends_by_root.get(root_id)
+        if ends is None:
+            return corner_id
+        end_id, other_end_id = ends
+        assert corner_id in ends, \
+            "Corner %s is in the middle of a path" % corner_id
+        if end_id == corner_id:
+            return other_end_id
+
+        return end_id
+
+    def get_closing_side_ids(self, root_id):
+        end_id, other_end_id = self.ends_by_root[root_id]
+        return set(self.corner_sides[end_id]) \
+            & set(self.corner_sides[other_end_id])
+
+    def forbid_closing_sides(self):
+        # With a single path, closing it might finish the puzzle
+        if self.paths_count + self.loops_count < 2:
+            return False
+
+        changed = False
+        sides_by_id = self.puzzle.board.sides_by_id
+        for root_id in self.unchecked_roots:
+            for side_id in self.get_closing_side_ids(root_id):
+                side = sides_by_id[side_id]
+                if side.solved:
+                    continue
+                side.solved_is_closed = False
+                changed = True
+        self.unchecked_roots.clear()
+
+        return changed
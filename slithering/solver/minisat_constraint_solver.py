@@ -1,9 +1,15 @@
-from satispy import Variable, Cnf
-from satispy.solver import Minisat
+try:
+    from satispy import Variable, Cnf
+    from satispy.solver import Minisat
+except ImportError:
+    # `SatConstraintSolver` solves the same, without `satispy` or `minisat`
+    Variable = Cnf = Minisat = None
 
 
 class MinisatConstraintSolver(object):
     def __init__(self, puzzle, debug=False):
+        assert Minisat is not None, \
+            "satispy is not installed: use SatConstraintSolver instead"
         self.puzzle = puzzle
         self.debug = debug
         self.variables = {
@@ -0,0 +1,381 @@
+"""
+A CDCL SAT solver, that runs in-process, on integer literals.
+
+As in DIMACS, variables are positive integers, and the literal `v` means that
+variable `v` is true, while `-v` means that it's false. Clauses are added
+with `add_clause`, and `solve` returns a model, as a list of values by
+variable, or `None` if the clauses can't be satisfied, optionally under some
+assumed literals. Clauses and learned clauses are kept between calls, so
+calling it repeatedly, like `get_backbone` does, gets cheaper.
+
+It uses two watched literals per clause, first UIP conflict analysis with
+non-chronological backjumping, decisions by activity with saved phases, and
+restarts on the Luby sequence.
+"""
+import heapq
+
+# The number of conflicts in the unit of the restarts sequence
+RESTART_UNIT = 64
+ACTIVITY_DECAY = 0.95
+ACTIVITY_LIMIT = 1e100
+
+
+def luby(index):
+    """The `index`-th term, from 0, of the Luby sequence: 1 1 2 1 1 2 4..."""
+    size, exponent = 1, 0
+    while size < index + 1:
+        exponent += 1
+        size = 2 * size + 1
+    while size - 1 != index:
+        size = (size - 1) // 2
+        exponent -= 1
+        index %= size
+
+    return 2 ** exponent
+
+
+class SatSolver(object):
+    def __init__(self):
+        self.variables_count = 0
+        # By variable
+        self.values = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.phases = [False]
+        self.activities = [0.]
+        # By literal index: `2 * variable` for the true literal, and
+        # `2 * variable + 1` for the false one
+        self.watches = [[], []]
+
+        self.trail = []
+        self.trail_limits = []
+        self.propagated_count = 0
+        self.order = []
+        self.activity_increment = 1.
+        self.is_unsatisfiable = False
+
+        self.clauses_count = 0
+        self.learned_count = 0
+        self.conflicts_count = 0
+        self.decisions_count = 0
+        self.solves_count = 0
+
+    @staticmethod
+    def literal_index(literal):
+        if literal > 0:
+            return 2 * literal
+        return -2 * literal + 1
+
+    def ensure_variable(self, variable):
+        while self.variables_count < variable:
+            self.variables_count += 1
+            self.values.append(None)
+            self.levels.append(0)
+            self.reasons.append(None)
+            self.phases.append(False)
+            self.activities.append(0.)
+            self.watches.extend(([], []))
+            heapq.heappush(self.order, (0., self.variables_count))
+
+    def get_literal_value(self, literal):
+        value = self.values[abs(literal)]
+        if value is None:
+            return None
+        return value == (literal > 0)
+
+    @property
+    def level(self):
+        return len(self.trail_limits)
+
+    def add_clause(self, literals):
+        """
+        Add a clause, as an iterable of literals, and return `False` if the
+        clauses became unsatisfiable
+        """
+        if self.is_unsatisfiable:
+            return False
+        self.backtrack(0)
+
+        clause = []
+        for literal in set(literals):
+            if -literal in clause:
+                # It's always satisfied
+                return True
+            self.ensure_variable(abs(literal))
+            value = self.get_literal_value(literal)
+            if value is True:
+                return True
+            if value is None:
+                clause.append(literal)
+        self.clauses_count += 1
+
+        if not clause:
+            self.is_unsatisfiable = True
+            return False
+        if len(clause) == 1:
+            self.assign(clause[0], None)
+            if self.propagate() is not None:
+                self.is_unsatisfiable = True
+                return False
+            return True
+
+        self.watch(clause)
+
+        return True
+
+    def watch(self, clause):
+        self.watches[self.literal_index(clause[0])].append(clause)
+        self.watches[self.literal_index(clause[1])].append(clause)
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = literal > 0
+        self.levels[variable] = self.level
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """Propagate the assignments, and return a conflicting clause if any"""
+        values, watches, trail = self.values, self.watches, self.trail
+        literal_index = self.literal_index
+        while self.propagated_count < len(trail):
+            false_literal = -trail[self.propagated_count]
+            self.propagated_count += 1
+            false_index = literal_index(false_literal)
+            watching = watches[false_index]
+            kept = []
+            conflict = None
+            for position, clause in enumerate(watching):
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+                first = clause[0]
+                first_value = values[abs(first)]
+                if first_value is not None and first_value == (first > 0):
+                    kept.append(clause)
+                    continue
+
+                for other_position in xrange(2, len(clause)):
+                    other = clause[other_position]
+                    other_value = values[abs(other)]
+                    if other_value is None or other_value == (other > 0):
+                        clause[1], clause[other_position] = \
+                            other, false_literal
+                        watches[literal_index(other)].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if first_value is None:
+                        self.assign(first, clause)
+                    else:
+                        conflict = clause
+                        kept.extend(watching[position + 1:])
+                        break
+            watches[false_index] = kept
+            if conflict is not None:
+                return conflict
+
+        return None
+
+    def analyze(self, conflict):
+        """
+        Find the first UIP clause to learn from a conflict, and the level to
+        backjump to
+        """
+        levels, reasons, trail = self.levels, self.reasons, self.trail
+        level = self.level
+        learned = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        position = len(trail) - 1
+        clause = conflict
+        while True:
+            for other in clause:
+                if other == literal:
+                    continue
+                variable = abs(other)
+                if variable in seen or not levels[variable]:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+            while abs(trail[position]) not in seen:
+                position -= 1
+            literal = trail[position]
+            position -= 1
+            pending -= 1
+            if not pending:
+                break
+            clause = reasons[abs(literal)]
+        learned[0] = -literal
+
+        backjump_level = 0
+        if len(learned) > 1:
+            highest_position = max(
+                xrange(1, len(learned)),
+                key=lambda index: levels[abs(learned[index])])
+            learned[1], learned[highest_position] = \
+                learned[highest_position], learned[1]
+            backjump_level = levels[abs(learned[1])]
+
+        return learned, backjump_level
+
+    def bump(self, variable):
+        activities = self.activities
+        activities[variable] += self.activity_increment
+        if activities[variable] > ACTIVITY_LIMIT:
+            for other_variable in xrange(1, self.variables_count + 1):
+                activities[other_variable] /= ACTIVITY_LIMIT
+            self.activity_increment /= ACTIVITY_LIMIT
+            self.order = [
+                (-activities[other_variable], other_variable)
+                for other_variable in xrange(1, self.variables_count + 1)
+                if self.values[other_variable] is None
+            ]
+            heapq.heapify(self.order)
+        elif self.values[variable] is None:
+            heapq.heappush(self.order, (-activities[variable], variable))
+
+    def backtrack(self, level):
+        if self.level <= level:
+            return
+
+        values, reasons, phases, activities, order = \
+            self.values, self.reasons, self.phases, self.activities, \
+            self.order
+        trail = self.trail
+        limit = self.trail_limits[level]
+        for literal in trail[limit:]:
+            variable = abs(literal)
+            phases[variable] = literal > 0
+            values[variable] = None
+            reasons[variable] = None
+            heapq.heappush(order, (-activities[variable], variable))
+        del trail[limit:]
+        del self.trail_limits[level:]
+        self.propagated_count = limit
+
+    def pick_branch_variable(self):
+        order, values, activities = self.order, self.values, self.activities
+        while order:
+            negative_activity, variable = heapq.heappop(order)
+            if values[variable] is None \
+                    and -negative_activity == activities[variable]:
+                return variable
+
+        for variable in xrange(1, self.variables_count + 1):
+            if values[variable] is None:
+                return variable
+
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Find a model of the clauses, where the assumed literals are true, as a
+        list of values by variable, or return `None` if there is none
+        """
+        self.solves_count += 1
+        if self.is_unsatisfiable:
+            return None
+        self.backtrack(0)
+        if self.propagate() is not None:
+            self.is_unsatisfiable = True
+            return None
+
+        restarts_count = 0
+        conflicts_until_restart = RESTART_UNIT * luby(0)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts_count += 1
+                if not self.level:
+                    self.is_unsatisfiable = True
+                    return None
+                learned, backjump_level = self.analyze(conflict)
+                self.backtrack(backjump_level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.learned_count += 1
+                    self.watch(learned)
+                    self.assign(learned[0], learned)
+                self.activity_increment /= ACTIVITY_DECAY
+
+                conflicts_until_restart -= 1
+                if not conflicts_until_restart:
+                    restarts_count += 1
+                    conflicts_until_restart = \
+                        RESTART_UNIT * luby(restarts_count)
+                    self.backtrack(0)
+                continue
+
+            if self.level < len(assumptions):
+                literal = assumptions[self.level]
+                self.ensure_variable(abs(literal))
+                value = self.get_literal_value(literal)
+                if value is False:
+                    self.backtrack(0)
+                    return None
+                self.trail_limits.append(len(self.trail))
+                if value is None:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.pick_branch_variable()
+            if variable is None:
+                model = list(self.values)
+                self.backtrack(0)
+                return model
+
+            self.decisions_count += 1
+            self.trail_limits.append(len(self.trail))
+            if self.phases[variable]:
+                self.assign(variable, None)
+            else:
+                self.assign(-variable, None)
+
+    def get_backbone(self, variables):
+        """
+        The literals of the variables that are true in every model, or `None`
+        if there is no model at all.
+        Each candidate literal of a model is checked by assuming its negation:
+        if that can't be satisfied, it's in the backbone, and it's added as a
+        clause, otherwise the new model rules out the candidates it disagrees
+        with
+        """
+        variables = list(variables)
+        for variable in variables:
+            self.ensure_variable(variable)
+        model = self.solve()
+        if model is None:
+            return None
+
+        candidates = {
+            variable if model[variable] else -variable
+            for variable in variables
+        }
+        backbone = set()
+        while candidates:
+            literal = candidates.pop()
+            other_model = self.solve([-literal])
+            if other_model is None:
+                backbone.add(literal)
+                self.add_clause([literal])
+                continue
+            candidates = {
+                candidate
+                for candidate in candidates
+                if other_model[abs(candidate)] == (candidate > 0)
+            }
+
+        return backbone
+
+    def get_stats_report(self):
+        return '%s variables, %s clauses, %s learned, %s solves, ' \
+               '%s decisions, %s conflicts' % (
+                   self.variables_count, self.clauses_count,
+                   self.learned_count, self.solves_count,
+                   self.decisions_count, self.conflicts_count)
@@ -0,0 +1,149 @@
+import copy
+
+from slithering.base.bitset import iter_mask_ids
+from slithering.base.union_find import UnionFind
+from slithering.solver.sat import SatSolver
+
+
+class SatConstraintSolver(object):
+    """
+    Solve the sides that all the solutions of the constraints agree on, ie
+    their backbone, with the in-process `SatSolver`.
+
+    It's a drop-in replacement of `MinisatConstraintSolver`, that doesn't need
+    the `minisat` binary, or `satispy`, and it's what the `TIER_SAT`
+    sub-solver uses, when the cheaper tiers can't make any more progress.
+
+    The constraints are split into groups that share sides, which have
+    independent backbones. A group whose constraints were all there at the
+    last check, and whose sides weren't solved since, can't have a new
+    backbone, so only the other groups are checked, each with a new
+    `SatSolver` of its own clauses: each constraint forbids the assignments
+    of its sides that it doesn't allow, with a clause per assignment. Forks
+    remember what was checked, so they only check the groups that changed
+    after forking
+    """
+    def __init__(self, puzzle, debug=False):
+        self.puzzle = puzzle
+        self.debug = debug
+        self.checked_constraints = frozenset()
+        self.checked_sides_solved_mask = 0
+
+    def fork(self):
+        """A copy that can go on checking separately"""
+        return copy.copy(self)
+
+    @property
+    def constraints(self):
+        return self.puzzle.constraints
+
+    def apply(self):
+        if self.debug:
+            print '*' * 80
+            print 'Starting with %s constraints' % len(self.constraints)
+
+        groups = self.get_changed_groups()
+        if self.debug:
+            print 'SAT: checking %s changed groups' % len(groups)
+        solved_sides = frozenset(
+            fact
+            for group in groups
+            for fact in self.get_backbone(group)
+        )
+        self.checked_constraints = frozenset(self.constraints)
+        self.checked_sides_solved_mask = self.puzzle.state.sides_solved.mask
+        changed = self.apply_solved_sides(solved_sides)
+
+        return changed
+
+    def get_changed_groups(self):
+        """
+        The groups of constraints that share sides, that have new constraints,
+        or newly solved sides, since the last check
+        """
+        sides = UnionFind(self.puzzle.board.topology.sides_count)
+        constraints = tuple(self.constraints)
+        for constraint in constraints:
+            side_id = constraint.side_ids[0]
+            for other_side_id in constraint.side_ids[1:]:
+                sides.union(side_id, other_side_id)
+
+        changed_root_ids = {
+            sides.find(constraint.side_ids[0])
+            for constraint in constraints
+            if constraint not in self.checked_constraints
+        }
+        newly_solved_mask = \
+            self.puzzle.state.sides_solved.mask \
+            & ~self.checked_sides_solved_mask
+        changed_root_ids.update(
+            sides.find(side_id)
+            for side_id in iter_mask_ids(newly_solved_mask))
+
+        groups = {}
+        for constraint in constraints:
+            root_id = sides.find(constraint.side_ids[0])
+            if root_id in changed_root_ids:
+                groups.setdefault(root_id, []).append(constraint)
+
+        return groups.values()
+
+    def get_backbone(self, constraints):
+        """The facts about the unsolved sides that the constraints force"""
+        sides = sorted(
+            {side for constraint in constraints for side in constraint.sides},
+            key=lambda side: side.id)
+        # Each side is the variable of its position plus one, so that the
+        # solver only decides on the sides of the group
+        variables_by_side = {
+            side: variable
+            for variable, side in enumerate(sides, 1)
+        }
+        sat_solver = SatSolver()
+        for constraint in constraints:
+            for clause in self.constraint_to_clauses(
+                    constraint, variables_by_side):
+                sat_solver.add_clause(clause)
+        unsolved_variables = []
+        for side in sides:
+            variable = variables_by_side[side]
+            if side.solved:
+                sat_solver.add_clause(
+                    [variable if side.is_closed else -variable])
+            else:
+                unsolved_variables.append(variable)
+
+        backbone = sat_solver.get_backbone(unsolved_variables)
+        assert backbone is not None, "Constraints ended up incompatible"
+        if self.debug:
+            print 'SAT: %s' % sat_solver.get_stats_report()
+
+        return [
+            (sides[abs(literal) - 1], literal > 0)
+            for literal in backbone
+        ]
+
+    def apply_solved_sides(self, solved_sides):
+        if self.debug:
+            print 'Apply %s solved sides' % len(solved_sides)
+
+        changed = False
+        for side, is_closed in solved_sides:
+            changed |= not side.solved
+            side.solved_is_closed = is_closed
+        return changed
+
+    def constraint_to_clauses(self, constraint, variables_by_side):
+        """A clause for each assignment that isn't in the table"""
+        variables = [
+            variables_by_side[side]
+            for side in constraint.ordered_sides
+        ]
+        table = constraint.table
+        for assignment in xrange(1 << len(variables)):
+            if table >> assignment & 1:
+                continue
+            yield [
+                -variable if assignment >> position & 1 else variable
+                for position, variable in enumerate(variables)
+            ]
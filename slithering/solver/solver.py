@@ -1,8 +1,36 @@
+import copy
+import time
+
+from slithering.base.bitset import iter_mask_ids
+from slithering.solver.sub_solvers import TIER_NAMES
+
+
 class PuzzleSolver(object):
+    """
+    Apply sub-solvers to a puzzle, in rounds, until they make no more changes.
+
+    All the parts are checked for suitable sub-solvers only at the start.
+    After each round, only the parts around the ones that were solved during
+    it are checked again, which is enough as long as the suitability of a
+    sub-solver for a part only depends on the part, and the parts that share
+    a side or a corner with it. This only makes finding the sub-solvers
+    proportional to the changes: the rest of a round is what the sub-solvers
+    take to apply their deductions.
+
+    Each round only applies the sub-solvers of the cheapest tier that makes
+    any changes, so that the expensive ones only run when the cheap ones
+    can't make any more progress. The tiers above `max_tier`, if it's set,
+    are not applied at all.
+
+    Hints that are given while solving, eg by the minimiser, are picked up
+    like the solved parts, and a forked solver can go on solving with them,
+    while this one is kept for when the puzzle is restored
+    """
     puzzle_sub_solver_classes = []
     cell_sub_solver_classes = []
     side_sub_solver_classes = []
     corner_sub_solver_classes = []
+    max_tier = None
 
     @classmethod
     def register_puzzle_sub_solver_class(cls, sub_solver_class):
@@ -24,36 +52,136 @@ class PuzzleSolver(object):
         cls.corner_sub_solver_classes.append(sub_solver_class)
         return sub_solver_class
 
-    def __init__(self, puzzle):
+    def __init__(self, puzzle, debug=True):
         self.puzzle = puzzle
+        self.debug = debug
+        self.tier_durations = {tier: 0. for tier in TIER_NAMES}
+        self.solved_masks = self.get_solved_masks()
+        self.hints_mask = self.puzzle.state.cells_hint_given.mask
+        self.found_puzzle_sub_solver_classes = frozenset()
         self.sub_solvers = self.find_new_sub_solvers()
         self.all_sub_solvers = frozenset(self.sub_solvers)
 
-    def find_new_sub_solvers(self):
+    def fork(self):
+        """
+        A copy that can go on solving, without changing this one, which can
+        be used again once the puzzle, and its constraints, are restored
+        """
+        solver = copy.copy(self)
+        solver.tier_durations = dict(self.tier_durations)
+        solver.sub_solvers = frozenset(
+            sub_solver.fork()
+            for sub_solver in self.sub_solvers
+        )
+
+        return solver
+
+    def get_solved_masks(self):
+        state = self.puzzle.state
+        return (
+            state.cells_solved.mask,
+            state.sides_solved.mask,
+            state.corners_solved.mask,
+        )
+
+    def get_parts_around_changes(self):
+        """
+        The cells, sides, and corners that were solved since the last call,
+        and the cells whose hints were given, with all the parts that share a
+        side or a corner with them: the cells and the sides around their
+        corners, and the corners next to them
+        """
+        solved_masks = self.get_solved_masks()
+        changed_cells_mask, changed_sides_mask, changed_corners_mask = (
+            mask ^ previous_mask
+            for mask, previous_mask in zip(solved_masks, self.solved_masks)
+        )
+        self.solved_masks = solved_masks
+        hints_mask = self.puzzle.state.cells_hint_given.mask
+        changed_cells_mask |= hints_mask ^ self.hints_mask
+        self.hints_mask = hints_mask
+        changed_cell_ids, changed_side_ids, changed_corner_ids = (
+            tuple(iter_mask_ids(mask))
+            for mask in (
+                changed_cells_mask, changed_sides_mask, changed_corners_mask)
+        )
+
+        topology = self.puzzle.board.topology
+        cell_ids = set(changed_cell_ids)
+        side_ids = set(changed_side_ids)
+        corner_ids = set(changed_corner_ids)
+        corner_sides = topology.corner_sides
+        corner_cells = topology.corner_cells
+        for cell_id in changed_cell_ids:
+            cell_ids.update(topology.cell_adjacent_cells[cell_id])
+            for corner_id in topology.cell_corners[cell_id]:
+                side_ids.update(corner_sides[corner_id])
+                corner_ids.add(corner_id)
+        for side_id in changed_side_ids:
+            side_ids.update(topology.side_neighbours[side_id])
+            for corner_id in topology.side_corners[side_id]:
+                cell_ids.update(corner_cells[corner_id])
+                corner_ids.add(corner_id)
+        for corner_id in changed_corner_ids:
+            cell_ids.update(corner_cells[corner_id])
+            side_ids.update(corner_sides[corner_id])
+            corner_ids.update(topology.corner_neighbours[corner_id])
+
+        board = self.puzzle.board
+        return (
+            board.get_parts('cells', sorted(cell_ids)),
+            board.get_parts('sides', sorted(side_ids)),
+            board.get_parts('corners', sorted(corner_ids)),
+        )
+
+    def find_new_sub_solvers(self, cells=None, sides=None, corners=None):
+        """
+        Create the suitable sub-solvers, for the puzzle, and for either all
+        the parts, or only the given ones
+        """
         sub_solvers = frozenset()
 
         sub_solvers |= self.find_new_puzzle_sub_solvers()
-        sub_solvers |= self.find_new_cell_sub_solvers()
-        sub_solvers |= self.find_new_side_sub_solvers()
-        sub_solvers |= self.find_new_corner_sub_solvers()
+        sub_solvers |= self.find_new_cell_sub_solvers(cells)
+        sub_solvers |= self.find_new_side_sub_solvers(sides)
+        sub_solvers |= self.find_new_corner_sub_solvers(corners)
+
+        if not self.debug:
+            for sub_solver in sub_solvers:
+                sub_solver.debug = False
 
         return sub_solvers
 
     def find_new_puzzle_sub_solvers(self):
-        return self.create_suitable_puzzle_sub_solvers(
-            self.puzzle_sub_solver_classes)
+        # There's only one sub-solver per class for the puzzle, so the classes
+        # that already have one are skipped, instead of creating it again
+        sub_solvers = self.create_suitable_puzzle_sub_solvers(
+            sub_solver_class
+            for sub_solver_class in self.puzzle_sub_solver_classes
+            if sub_solver_class not in self.found_puzzle_sub_solver_classes
+        )
+        self.found_puzzle_sub_solver_classes |= frozenset(
+            type(sub_solver) for sub_solver in sub_solvers)
 
-    def find_new_cell_sub_solvers(self):
+        return sub_solvers
+
+    def find_new_cell_sub_solvers(self, cells=None):
+        if cells is None:
+            cells = self.puzzle.cells
         return self.create_suitable_puzzle_item_sub_solvers(
-            self.puzzle.cells, self.cell_sub_solver_classes)
+            cells, self.cell_sub_solver_classes)
 
-    def find_new_side_sub_solvers(self):
+    def find_new_side_sub_solvers(self, sides=None):
+        if sides is None:
+            sides = self.puzzle.sides
         return self.create_suitable_puzzle_item_sub_solvers(
-            self.puzzle.sides, self.side_sub_solver_classes)
+            sides, self.side_sub_solver_classes)
 
-    def find_new_corner_sub_solvers(self):
+    def find_new_corner_sub_solvers(self, corners=None):
+        if corners is None:
+            corners = self.puzzle.corners
         return self.create_suitable_puzzle_item_sub_solvers(
-            self.puzzle.corners, self.corner_sub_solver_classes)
+            corners, self.corner_sub_solver_classes)
 
     def create_suitable_puzzle_sub_solvers(self, sub_solver_classes):
         return frozenset(
@@ -74,12 +202,23 @@ class PuzzleSolver(object):
     def apply(self):
         changed = False
 
-        for sub_solver in self.sub_solvers:
-            changed |= sub_solver.apply()
+        for tier in sorted(TIER_NAMES):
+            if self.max_tier is not None and tier > self.max_tier:
+                break
+            changed = self.apply_tier(tier)
+            if changed:
+                break
 
-        new_sub_solvers = self.find_new_sub_solvers() - self.all_sub_solvers
-        self.sub_solvers |= new_sub_solvers
-        self.all_sub_solvers |= new_sub_solvers
+        new_sub_solvers = \
+            self.find_new_sub_solvers(*self.get_parts_around_changes()) \
+            - self.all_sub_solvers
+        if new_sub_solvers:
+            # They might be able to make changes on the next round
+            changed = True
+            # Only copy the sub-solvers when there are new ones, so that a
+            # round without any doesn't take time proportional to the board
+            self.sub_solvers |= new_sub_solvers
+            self.all_sub_solvers |= new_sub_solvers
 
         self.sub_solvers = frozenset(
             sub_solver
@@ -89,7 +228,30 @@ class PuzzleSolver(object):
 
         return changed
 
+    def apply_tier(self, tier):
+        changed = False
+
+        start = time.time()
+        for sub_solver in self.sub_solvers:
+            if sub_solver.tier == tier:
+                changed |= sub_solver.apply()
+        self.tier_durations[tier] += time.time() - start
+
+        return changed
+
+    def get_tier_durations_report(self):
+        return ', '.join(
+            '%s: %.3fs' % (TIER_NAMES[tier], self.tier_durations[tier])
+            for tier in sorted(TIER_NAMES)
+        )
+
     def solve(self):
+        if not self.debug:
+            while self.apply():
+                if self.puzzle.solved:
+                    break
+            return
+
         print 'Unsolved:', self.puzzle.solved, \
             len(self.puzzle.cells), 'cells', \
             len(self.puzzle.sides), 'sides', \
@@ -104,4 +266,5 @@ class PuzzleSolver(object):
                 len(self.puzzle.sides.solved), 'sides', \
                 len(self.puzzle.corners.solved), 'corners'
             if self.puzzle.solved:
-                break
\ No newline at end of file
+                break
+        print 'Time per tier:', self.get_tier_durations_report()
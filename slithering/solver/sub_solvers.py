@@ -1,5 +1,22 @@
+import copy
+
+# The tiers of sub-solvers, from the cheapest to the most expensive
+TIER_LOCAL = 0
+TIER_CONSTRAINTS = 1
+TIER_SAT = 2
+TIER_NAMES = {
+    TIER_LOCAL: 'local',
+    TIER_CONSTRAINTS: 'constraints',
+    TIER_SAT: 'sat',
+}
+
+
 class SubSolver(object):
     """A sub-solver that can make changes, or create new sub-solvers"""
+    debug = True
+    # A sub-solver is only applied when the cheaper tiers make no changes
+    tier = TIER_LOCAL
+
     def __init__(self):
         self.finished = False
 
@@ -15,6 +32,13 @@ class SubSolver(object):
 
         return self.hash_key() == other.hash_key()
 
+    def __ne__(self, other):
+        return not self == other
+
+    def fork(self):
+        """A copy that can go on applying separately, on a forked solver"""
+        return copy.copy(self)
+
     @classmethod
     def is_suitable(cls, *args, **kwargs):
         """Check whether the sub-solver can be created from the arguments"""
@@ -50,20 +74,36 @@ class CellSubSolver(PuzzleSubSolver):
         self.cell = cell
 
     def hash_key(self):
-        return tuple((type(self), self.cell.key))
+        return super(CellSubSolver, self).hash_key() \
+            + (self.cell.key,)
 
     @classmethod
     def is_suitable(cls, puzzle, cell):
         raise NotImplementedError()
 
 
+class SideSubSolver(PuzzleSubSolver):
+    def __init__(self, puzzle, side):
+        super(SideSubSolver, self).__init__(puzzle)
+        self.side = side
+
+    def hash_key(self):
+        return super(SideSubSolver, self).hash_key() \
+            + (self.side.key,)
+
+    @classmethod
+    def is_suitable(cls, puzzle, side):
+        raise NotImplementedError()
+
+
 class CornerSubSolver(PuzzleSubSolver):
     def __init__(self, puzzle, corner):
         super(CornerSubSolver, self).__init__(puzzle)
         self.corner = corner
 
     def hash_key(self):
-        return tuple((type(self), self.corner.key))
+        return super(CornerSubSolver, self).hash_key() \
+            + (self.corner.key,)
 
     @classmethod
     def is_suitable(cls, puzzle, corner):
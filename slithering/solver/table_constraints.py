@@ -0,0 +1,321 @@
+"""
+Constraints as truth tables.
+
+A `TableConstraint` has an ordered tuple of sides, and a table: a mask with a
+bit for every assignment of the sides that is allowed, where the assignment
+`a` closes the side at position `i` if bit `i` of `a` is set. A cell of a
+square board needs a 16 bit table, and one of a hexagonal board a 64 bit one.
+
+It supports the same operations as `Constraint`, and can be kept in
+`Constraints`, but compatibility, projection, and finding the common facts
+are done on the tables, instead of on sets of cases.
+
+Constraints are interned: there is only one constraint for each ordered
+tuple of sides and table, so they are compared by identity. The sources are
+not part of that: the sources of all the equal constraints are merged.
+"""
+from slithering.base.bitset import iter_mask_ids, popcount
+from slithering.solver.constraints import Case
+from slithering.utils import Interner
+
+closed_masks_cache = {}
+projection_masks_cache = {}
+counts_tables_cache = {}
+
+
+def get_closed_mask(count, position):
+    """The assignments of `count` sides that close the side at `position`"""
+    key = (count, position)
+    mask = closed_masks_cache.get(key)
+    if mask is None:
+        mask = closed_masks_cache[key] = sum(
+            1 << assignment
+            for assignment in xrange(1 << count)
+            if assignment >> position & 1
+        )
+
+    return mask
+
+
+def get_projection_masks(count, positions):
+    """
+    For each assignment of the sides at the positions, the mask of the
+    assignments of all `count` sides that agree with it
+    """
+    key = (count, positions)
+    masks = projection_masks_cache.get(key)
+    if masks is None:
+        masks = [0] * (1 << len(positions))
+        for assignment in xrange(1 << count):
+            projected_assignment = 0
+            for index, position in enumerate(positions):
+                projected_assignment |= (assignment >> position & 1) << index
+            masks[projected_assignment] |= 1 << assignment
+        masks = projection_masks_cache[key] = tuple(masks)
+
+    return masks
+
+
+def project(table, count, positions):
+    """The table of the assignments of the sides at the positions"""
+    projected_table = 0
+    for assignment, mask in enumerate(get_projection_masks(count, positions)):
+        if table & mask:
+            projected_table |= 1 << assignment
+
+    return projected_table
+
+
+def lift(projected_table, count, positions):
+    """
+    The table of the assignments of all `count` sides, that agree with the
+    table of the sides at the positions
+    """
+    masks = get_projection_masks(count, positions)
+    table = 0
+    for assignment in iter_mask_ids(projected_table):
+        table |= masks[assignment]
+
+    return table
+
+
+def get_counts_table(count, closed_counts):
+    """The table of the assignments that close any of `closed_counts` sides"""
+    key = (count, closed_counts)
+    table = counts_tables_cache.get(key)
+    if table is None:
+        table = counts_tables_cache[key] = sum(
+            1 << assignment
+            for assignment in xrange(1 << count)
+            if popcount(assignment) in closed_counts
+        )
+
+    return table
+
+
+class TableConstraint(object):
+    __slots__ = (
+        'ordered_sides', 'side_ids', 'sides', 'positions', 'table', 'sources',
+        '_common_facts', '_hash', '__weakref__',
+    )
+
+    interner = Interner()
+
+    def __new__(cls, ordered_sides, table, source=None):
+        ordered_sides = tuple(ordered_sides)
+        side_ids = tuple(side.id for side in ordered_sides)
+        key = cls.get_interning_key(ordered_sides, side_ids, table)
+        constraint = cls.interner.get(
+            key, cls.create, ordered_sides, side_ids, table)
+        if source is not None:
+            constraint.add_sources(frozenset([source]))
+
+        return constraint
+
+    @staticmethod
+    def get_interning_key(ordered_sides, side_ids, table):
+        # Sides of different boards can have the same ids, so the first side
+        # tells the boards apart
+        return side_ids, table, ordered_sides[0] if ordered_sides else None
+
+    @classmethod
+    def create(cls, ordered_sides, side_ids, table):
+        constraint = object.__new__(cls)
+        constraint.ordered_sides = ordered_sides
+        constraint.side_ids = side_ids
+        constraint.sides = frozenset(ordered_sides)
+        constraint.positions = {
+            side: position
+            for position, side in enumerate(ordered_sides)
+        }
+        constraint.init_table(table)
+
+        return constraint
+
+    def init_table(self, table):
+        self.table = table
+        self.sources = frozenset()
+        self._common_facts = None
+        # The hash doesn't depend on object ids, so that sets of constraints
+        # are iterated in the same order every time
+        self._hash = hash((self.side_ids, table))
+
+    def create_with_table(self, table):
+        constraint = object.__new__(type(self))
+        constraint.ordered_sides = self.ordered_sides
+        constraint.side_ids = self.side_ids
+        constraint.sides = self.sides
+        constraint.positions = self.positions
+        constraint.init_table(table)
+
+        return constraint
+
+    def add_sources(self, sources):
+        if not sources <= self.sources:
+            self.sources |= sources
+
+    @property
+    def source(self):
+        if not self.sources:
+            return None
+
+        return u', '.join(sorted(self.sources))
+
+    @classmethod
+    def from_closed_counts(cls, sides, closed_counts, source=None):
+        """Allow the assignments that close any of `closed_counts` sides"""
+        ordered_sides = sorted(sides, key=lambda side: side.id)
+        table = get_counts_table(len(ordered_sides), tuple(closed_counts))
+
+        return cls(ordered_sides, table, source=source)
+
+    def with_table(self, table):
+        if table == self.table:
+            return self
+
+        key = self.get_interning_key(self.ordered_sides, self.side_ids, table)
+        constraint = self.interner.get(key, self.create_with_table, table)
+        constraint.add_sources(self.sources)
+
+        return constraint
+
+    def __len__(self):
+        return popcount(self.table)
+
+    def __iter__(self):
+        for assignment in iter_mask_ids(self.table):
+            yield Case((
+                (side, bool(assignment >> position & 1))
+                for position, side in enumerate(self.ordered_sides)
+            ), source=self.source)
+
+    def __hash__(self):
+        return self._hash
+
+    def __str__(self):
+        return u'TableConstraint(%s\n%s\n)' % (
+            u'source=%s' % self.source if self.source else '',
+            u'\n'.join(
+                u'    %s' % line
+                for line in u'\n'.join(map(str, self)).split('\n')
+            )
+        )
+
+    @property
+    def common_facts(self):
+        """The facts that all the allowed assignments agree on"""
+        if self._common_facts is None:
+            count = len(self.ordered_sides)
+            table = self.table
+            common_facts = []
+            for position, side in enumerate(self.ordered_sides):
+                closed = table & get_closed_mask(count, position)
+                if not closed:
+                    common_facts.append((side, False))
+                elif closed == table:
+                    common_facts.append((side, True))
+            self._common_facts = frozenset(common_facts)
+
+        return self._common_facts
+
+    @property
+    def common_facts_sides(self):
+        return frozenset(side for side, _ in self.common_facts)
+
+    def simplified(self):
+        if len(self) == 1:
+            return [self]
+
+        common_sides = self.common_facts_sides
+        if not common_sides:
+            return [self]
+        if common_sides == self.sides:
+            return [self]
+
+        simplified_constraints = filter(None, [
+            self.excluding_sides(common_sides),
+            self.filtering_sides(common_sides),
+        ])
+
+        assert simplified_constraints, \
+            "Simplifying constraint %s ended up in incompatibility" \
+            % str(self)
+
+        return simplified_constraints
+
+    def being_compatible_with(self, *others):
+        count = len(self.ordered_sides)
+        table = self.table
+        for other in others:
+            shared_sides = [
+                side
+                for side in self.ordered_sides
+                if side in other.positions
+            ]
+            if not shared_sides:
+                continue
+            allowed_table = project(
+                other.table, len(other.ordered_sides),
+                tuple(other.positions[side] for side in shared_sides))
+            table &= lift(
+                allowed_table, count,
+                tuple(self.positions[side] for side in shared_sides))
+
+        return self.with_table(table)
+
+    def agrees_with(self, side, is_closed):
+        """Do all the allowed assignments agree with a fact"""
+        position = self.positions.get(side)
+        if position is None:
+            return True
+
+        closed = \
+            self.table & get_closed_mask(len(self.ordered_sides), position)
+        if is_closed:
+            return closed == self.table
+
+        return not closed
+
+    def restricted_to(self, facts):
+        """The allowed assignments that agree with the facts, by side"""
+        count = len(self.ordered_sides)
+        table = self.table
+        for position, side in enumerate(self.ordered_sides):
+            if side not in facts:
+                continue
+            closed_mask = get_closed_mask(count, position)
+            if facts[side]:
+                table &= closed_mask
+            else:
+                table &= ~closed_mask
+
+        assert table, \
+            "Constraint %s is incompatible with the assigned facts" \
+            % str(self)
+
+        return self.with_table(table)
+
+    def keeping_positions(self, positions):
+        if len(positions) == len(self.ordered_sides):
+            return self
+
+        constraint = TableConstraint(
+            (self.ordered_sides[position] for position in positions),
+            project(self.table, len(self.ordered_sides), positions))
+        constraint.add_sources(self.sources)
+
+        return constraint
+
+    def excluding_sides(self, sides):
+        return self.keeping_positions(tuple(
+            position
+            for position, side in enumerate(self.ordered_sides)
+            if side not in sides
+        ))
+
+    def filtering_sides(self, sides):
+        return self.keeping_positions(tuple(
+            position
+            for position, side in enumerate(self.ordered_sides)
+            if side in sides
+        ))
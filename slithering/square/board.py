@@ -9,6 +9,12 @@ class SquareBoard(RegularPolygonBoard):
         self.width, self.height = width, height
         super(SquareBoard, self).__init__(**kwargs)
 
+    def get_shape_kwargs(self):
+        return {
+            'width': self.width,
+            'height': self.height,
+        }
+
     def create_cells(self):
         cells = {
             (x, y): slithering.base.parts.Cell((x, y))
@@ -57,12 +63,23 @@ class SquareBoard(RegularPolygonBoard):
 
         return slithering.base.parts.Cells(cells.itervalues())
 
-    def row(self, y):
-        return [
-            self.cells[(x, y)]
-            for x in xrange(self.height)
-        ]
+    def ring(self, key, radius):
+        """The cells on the perimeter of the square around a cell"""
+        if radius == 0:
+            return [self.cells[key]]
 
-    @property
-    def rows(self):
-        return map(self.row, xrange(self.height))
\ No newline at end of file
+        center_x, center_y = key
+        left, right = center_x - radius, center_x + radius
+        top, bottom = center_y - radius, center_y + radius
+        positions = (
+            [(x, top) for x in xrange(left, right)]
+            + [(right, y) for y in xrange(top, bottom)]
+            + [(x, bottom) for x in xrange(right, left, -1)]
+            + [(left, y) for y in xrange(bottom, top, -1)]
+        )
+
+        return [
+            self.cells_by_id[x * self.height + y]
+            for x, y in positions
+            if 0 <= x < self.width and 0 <= y < self.height
+        ]
\ No newline at end of file
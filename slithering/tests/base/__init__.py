@@ -2,3 +2,10 @@ from slithering.tests.base.board import *
 from slithering.tests.base.puzzle import *
 from slithering.tests.base.puzzle_svg import *
 from slithering.tests.base.solver import *
+from slithering.tests.base.constraints import *
+from slithering.tests.base.minimiser import *
+from slithering.tests.base.counter import *
+from slithering.tests.base.loop_solver import *
+from slithering.tests.base.cell_parity_solver import *
+from slithering.tests.base.degree_solver import *
+from slithering.tests.base.sat import *
@@ -0,0 +1,112 @@
+import random
+
+from slithering import batch
+from slithering.tests.base.base import BasePuzzleTestCase
+
+
+class BaseTestPuzzleBatch(BasePuzzleTestCase):
+    batch_size = 5
+    batch_count = 4
+    master_seed = 42
+
+    @property
+    def shape(self):
+        shapes = [
+            shape
+            for shape, (_, puzzle_class) in batch.SHAPES.iteritems()
+            if puzzle_class is self.puzzle_class
+        ]
+        self.assertEqual(len(shapes), 1)
+        return shapes[0]
+
+    def generate_records(self, workers):
+        return list(batch.generate_puzzle_records(
+            self.shape, self.batch_size, self.batch_size, self.batch_count,
+            self.master_seed, workers=workers))
+
+    def test_seeds_are_drawn_like_puzzle_seeds(self):
+        # `Puzzle.get_random_seed` uses the global random state
+        random_state = random.getstate()
+        try:
+            random.seed(self.master_seed)
+            puzzle_seeds = [
+                self.puzzle.get_random_seed()
+                for _ in xrange(self.batch_count)
+            ]
+        finally:
+            random.setstate(random_state)
+        self.assertEqual(
+            batch.get_puzzle_seeds(self.master_seed, self.batch_count),
+            puzzle_seeds)
+
+    def test_records_are_the_same_for_any_number_of_workers(self):
+        self.assertEqual(self.generate_records(1), self.generate_records(2))
+
+    def test_records_are_in_order(self):
+        self.assertEqual(
+            [record['index'] for record in self.generate_records(2)],
+            range(self.batch_count))
+
+    def test_record_recreates_the_puzzle(self):
+        record, = batch.generate_puzzle_records(
+            self.shape, self.batch_size, self.batch_size, 1,
+            self.master_seed, workers=1)
+        puzzle = batch.create_puzzle(
+            self.shape, self.batch_size, self.batch_size, record['seed'])
+        puzzle_from_record = batch.create_puzzle_from_record(record)
+        self.assertEqual(
+            {cell.key for cell in puzzle_from_record.cells.internal},
+            {cell.key for cell in puzzle.cells.internal})
+
+    def test_stream_has_the_same_records_as_the_batch(self):
+        with batch.PuzzleStream(
+                self.shape, self.batch_size, self.batch_size,
+                self.master_seed, buffer_size=2, workers=2) as stream:
+            records = [next(stream) for _ in xrange(self.batch_count)]
+        self.assertEqual(records, self.generate_records(1))
+
+    def test_stream_buffer_is_bounded(self):
+        with batch.PuzzleStream(
+                self.shape, self.batch_size, self.batch_size,
+                self.master_seed, buffer_size=2, workers=2) as stream:
+            next(stream)
+            self.assertEqual(len(stream.pending), 2)
+
+    def test_stream_ends_after_count(self):
+        stream = batch.PuzzleStream(
+            self.shape, self.batch_size, self.batch_size, self.master_seed,
+            count=2, workers=1)
+        self.assertEqual(len(list(stream)), 2)
+
+    def test_stream_starts_workers_only_when_used(self):
+        stream = batch.PuzzleStream(
+            self.shape, self.batch_size, self.batch_size, self.master_seed,
+            count=2, workers=2)
+        self.assertIsNone(stream.pool)
+        next(stream)
+        self.assertIsNotNone(stream.pool)
+        stream.close()
+        self.assertIsNone(stream.pool)
+
+    def test_stream_stops_workers_when_it_ends(self):
+        stream = batch.PuzzleStream(
+            self.shape, self.batch_size, self.batch_size, self.master_seed,
+            count=2, workers=2)
+        self.assertEqual(len(list(stream)), 2)
+        self.assertIsNone(stream.pool)
+        self.assertEqual(list(stream), [])
+        self.assertIsNone(stream.pool)
+
+    def test_growth_ends_with_the_puzzle(self):
+        seed, = batch.get_puzzle_seeds(self.master_seed, 1)
+        growth_records = list(batch.generate_growth_records(
+            self.shape, self.batch_size, self.batch_size, seed, step_size=2))
+        puzzle = batch.create_puzzle(
+            self.shape, self.batch_size, self.batch_size, seed)
+        puzzle_from_record = batch.create_puzzle_from_record(
+            growth_records[-1])
+        self.assertEqual(
+            {cell.key for cell in puzzle_from_record.cells.internal},
+            {cell.key for cell in puzzle.cells.internal})
+        self.assertEqual(
+            len(growth_records), (len(puzzle.cells.internal) + 1) // 2)
@@ -1,5 +1,6 @@
 from slithering.tests.base.base import BaseBoardTestCase
 from slithering.tests.base.parts import BaseAllBoardPartsTests
+from slithering.tests.base.topology import BaseTestBoardTopology
 
 
 class BaseTestBoardCreation(BaseBoardTestCase):
@@ -9,5 +10,6 @@ class BaseTestBoardCreation(BaseBoardTestCase):
 
 class BaseAllBoardTests(
         BaseTestBoardCreation,
-        BaseAllBoardPartsTests):
+        BaseAllBoardPartsTests,
+        BaseTestBoardTopology):
     pass
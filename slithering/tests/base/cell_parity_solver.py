@@ -0,0 +1,47 @@
+from slithering.base.union_find import ParityUnionFind
+from slithering.solver.cell_parity_solver import CellParitySolver
+from slithering.tests.base.base import BasePuzzleTestCase
+
+
+class BaseTestCellParitySolver(BasePuzzleTestCase):
+    def setUp(self):
+        super(BaseTestCellParitySolver, self).setUp()
+        self.puzzle.state.clear_solved()
+
+    def solve_sides(self, sides):
+        for side in sides:
+            side.solved_is_closed = side.is_closed
+
+    def test_solves_a_whole_group_when_it_reaches_the_outside(self):
+        cell_parity_solver = CellParitySolver(self.puzzle)
+        self.solve_sides(
+            side
+            for side in self.puzzle.sides
+            if not side.is_on_edge
+        )
+        self.assertFalse(cell_parity_solver.apply())
+        self.assertFalse(self.puzzle.cells.solved)
+        self.assertEqual(len(cell_parity_solver.unsolved_ids_by_root), 1)
+
+        self.solve_sides(list(self.puzzle.sides.on_edge)[:1])
+        self.assertTrue(cell_parity_solver.apply())
+        self.assertEqual(
+            len(self.puzzle.cells.solved), len(self.puzzle.cells))
+        self.assertEqual(
+            len(self.puzzle.sides.solved), len(self.puzzle.sides))
+        self.assertFalse(cell_parity_solver.unsolved_ids_by_root)
+
+    def test_solves_the_sides_between_solved_cells(self):
+        for cell in self.puzzle.cells:
+            cell.solved_is_internal = cell.is_internal
+        self.assertTrue(CellParitySolver(self.puzzle).apply())
+        self.assertEqual(
+            len(self.puzzle.sides.solved), len(self.puzzle.sides))
+
+    def test_detects_contradicting_parities(self):
+        cells = ParityUnionFind(3)
+        cells.union(0, 1, 1)
+        cells.union(1, 2, 1)
+        self.assertEqual(cells.get_parity(0, 2), 0)
+        with self.assertRaises(AssertionError):
+            cells.union(0, 2, 1)
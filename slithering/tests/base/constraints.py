@@ -0,0 +1,218 @@
+import itertools
+
+from slithering.solver.constraints import Case, Constraint, Constraints
+from slithering.solver.custom_sub_solvers import CellHintSubSolver, \
+    CornerConstraints
+from slithering.solver.table_constraints import TableConstraint
+from slithering.tests.base.base import BasePuzzleTestCase
+
+
+class BaseTestConstraints(BasePuzzleTestCase):
+    def get_cell_with_open_and_closed_sides(self):
+        return next(
+            cell
+            for cell in self.puzzle.cells
+            if 0 < cell.hint < len(cell.sides)
+        )
+
+    def get_hint_constraint(self, cell):
+        return CellHintSubSolver(self.puzzle, cell).constraint()
+
+    def test_assign_forces_the_last_side_of_a_hint(self):
+        cell = self.get_cell_with_open_and_closed_sides()
+        constraints = Constraints()
+        constraints.add(self.get_hint_constraint(cell))
+        last_side = cell.sides.ordered[-1]
+        facts = [
+            (side, side.is_closed)
+            for side in cell.sides.ordered[:-1]
+        ]
+
+        assigned_facts = constraints.assign(facts)
+        self.assertEqual(
+            set(assigned_facts),
+            set(facts) | {(last_side, last_side.is_closed)})
+        self.assertFalse(constraints)
+        self.assertFalse(constraints.resolved)
+
+    def test_added_constraints_are_restricted_to_assigned_facts(self):
+        cell = self.get_cell_with_open_and_closed_sides()
+        constraints = Constraints()
+        last_side = cell.sides.ordered[-1]
+        constraints.assign(
+            (side, side.is_closed)
+            for side in cell.sides.ordered[:-1]
+        )
+
+        constraints.add(self.get_hint_constraint(cell))
+        self.assertEqual(
+            constraints.assign(()), [(last_side, last_side.is_closed)])
+
+    def test_assign_only_keeps_compatible_cases(self):
+        cell = self.get_cell_with_open_and_closed_sides()
+        constraints = Constraints()
+        constraint = self.get_hint_constraint(cell)
+        constraints.add(constraint)
+        side = cell.sides.ordered[0]
+
+        constraints.assign([(side, side.is_closed)])
+        self.assertFalse(constraints.by_side.get(side))
+        self.assertTrue(all(
+            case.sides == cell.sides - {side}
+            for remaining_constraint in constraints
+            for case in remaining_constraint
+        ))
+        self.assertLess(
+            sum(map(len, constraints)), len(constraint))
+
+    def get_hint_and_corner_constraints(self):
+        return [
+            self.get_hint_constraint(cell)
+            for cell in self.puzzle.cells
+        ] + [
+            CornerConstraints(self.puzzle, corner).constraint()
+            for corner in self.puzzle.corners
+        ]
+
+    def test_constraints_are_arc_consistent(self):
+        constraints = Constraints()
+        constraints.update(self.get_hint_and_corner_constraints())
+        self.assertFalse(constraints.worklist)
+        for constraint in constraints:
+            for other in constraints.sharing_sides_with(constraint):
+                self.assertEqual(
+                    constraint.being_compatible_with(other), constraint)
+
+    def test_only_constraints_that_share_sides_are_revised(self):
+        constraints = Constraints()
+        cell = self.get_cell_with_open_and_closed_sides()
+        constraints.add(self.get_hint_constraint(cell))
+        self.assertEqual(constraints.revisions_count, 0)
+
+        far_cell = next(
+            other_cell
+            for other_cell in self.puzzle.cells
+            if not other_cell.corners & cell.corners
+        )
+        constraints.add(self.get_hint_constraint(far_cell))
+        self.assertEqual(constraints.revisions_count, 0)
+
+        constraints.update(
+            CornerConstraints(self.puzzle, corner).constraint()
+            for corner in cell.corners
+        )
+        self.assertGreater(constraints.revisions_count, 0)
+        self.assertGreater(constraints.revisions_per_second, 0)
+
+    def test_counts_only_its_own_interning(self):
+        constraints = Constraints()
+        constraints.update(self.get_hint_and_corner_constraints())
+        self.assertGreater(
+            constraints.interning_hits + constraints.interning_misses, 0)
+        self.assertIn(
+            'interned constraints', constraints.get_interning_report())
+
+        other_constraints = Constraints()
+        self.assertEqual(
+            (other_constraints.interning_hits,
+             other_constraints.interning_misses),
+            (0, 0))
+        counts = (constraints.interning_hits, constraints.interning_misses)
+        other_constraints.update(self.get_hint_and_corner_constraints())
+        self.assertEqual(
+            (constraints.interning_hits, constraints.interning_misses),
+            counts)
+
+
+class BaseTestTableConstraint(BasePuzzleTestCase):
+    def get_cases_constraint(self, sides, closed_counts):
+        return Constraint(
+            Case((side, side in closed_sides) for side in sides)
+            for closed_count in closed_counts
+            for closed_sides in itertools.combinations(sides, closed_count)
+        )
+
+    def get_constraints_pair(self):
+        cell = next(iter(self.puzzle.cells))
+        corner = next(iter(cell.corners))
+        table_constraints = (
+            CellHintSubSolver(self.puzzle, cell).constraint(),
+            CornerConstraints(self.puzzle, corner).constraint(),
+        )
+        cases_constraints = (
+            self.get_cases_constraint(cell.sides, (cell.hint,)),
+            self.get_cases_constraint(corner.sides, (0, 2)),
+        )
+
+        return table_constraints, cases_constraints
+
+    def test_has_the_same_cases(self):
+        for table_constraint, cases_constraint in \
+                zip(*self.get_constraints_pair()):
+            self.assertEqual(set(table_constraint), set(cases_constraint))
+            self.assertEqual(len(table_constraint), len(cases_constraint))
+            self.assertEqual(table_constraint.sides, cases_constraint.sides)
+
+    def test_operations_match_constraint(self):
+        (hint_table, corner_table), (hint_cases, corner_cases) = \
+            self.get_constraints_pair()
+        compatible_table = hint_table.being_compatible_with(corner_table)
+        compatible_cases = hint_cases.being_compatible_with(corner_cases)
+        self.assertEqual(set(compatible_table), set(compatible_cases))
+        self.assertEqual(
+            compatible_table.common_facts, compatible_cases.common_facts)
+
+        shared_sides = hint_table.sides & corner_table.sides
+        self.assertEqual(
+            set(hint_table.filtering_sides(shared_sides)),
+            set(hint_cases.filtering_sides(shared_sides)))
+        self.assertEqual(
+            set(hint_table.excluding_sides(shared_sides)),
+            set(hint_cases.excluding_sides(shared_sides)))
+
+    def test_restricting_to_facts_resolves_the_constraint(self):
+        (hint_table, _), _ = self.get_constraints_pair()
+        facts = {side: side.is_closed for side in hint_table.sides}
+        restricted = hint_table.restricted_to(facts)
+        self.assertEqual(len(restricted), 1)
+        self.assertEqual(restricted.common_facts, frozenset(facts.items()))
+        self.assertTrue(all(
+            restricted.agrees_with(side, is_closed)
+            for side, is_closed in facts.iteritems()
+        ))
+
+    def test_equal_constraints_are_the_same_object(self):
+        cell = next(
+            cell
+            for cell in self.puzzle.cells
+            if 0 < cell.hint < len(cell.sides)
+        )
+        constraint = CellHintSubSolver(self.puzzle, cell).constraint()
+        self.assertIs(
+            CellHintSubSolver(self.puzzle, cell).constraint(), constraint)
+        lowest_table = constraint.table & -constraint.table
+        reduced = constraint.with_table(lowest_table)
+        self.assertIsNot(reduced, constraint)
+        self.assertIs(constraint.with_table(lowest_table), reduced)
+        self.assertIs(reduced.with_table(constraint.table), constraint)
+
+    def test_equal_constraints_keep_the_sources_of_all_their_creators(self):
+        cell = next(iter(self.puzzle.cells))
+        from_hint = TableConstraint.from_closed_counts(
+            cell.sides, (1,), source=u'From hint')
+        from_elsewhere = TableConstraint.from_closed_counts(
+            cell.sides, (1,), source=u'From elsewhere')
+        self.assertIs(from_elsewhere, from_hint)
+        self.assertEqual(
+            from_hint.sources, {u'From hint', u'From elsewhere'})
+        self.assertIn(u'From hint', from_hint.source)
+        self.assertIn(u'From elsewhere', from_hint.source)
+
+    def test_constraints_of_different_boards_are_not_shared(self):
+        cell = next(iter(self.puzzle.cells))
+        other_puzzle = self.create_puzzle(self.create_board())
+        other_puzzle.create_random_puzzle()
+        other_cell = other_puzzle.board.cells_by_id[cell.id]
+        self.assertIsNot(
+            TableConstraint.from_closed_counts(other_cell.sides, (1,)),
+            TableConstraint.from_closed_counts(cell.sides, (1,)))
@@ -0,0 +1,29 @@
+from slithering.solver.counter import SolutionCounter, count_solutions
+from slithering.tests.base.base import BasePuzzleTestCase
+
+
+class BaseTestSolutionCounter(BasePuzzleTestCase):
+    def test_puzzle_with_all_hints_has_a_unique_solution(self):
+        solution_count = count_solutions(self.puzzle)
+        self.assertEqual(solution_count.count, 1)
+        self.assertTrue(solution_count.is_unique)
+
+    def test_puzzle_without_hints_stops_at_the_limit(self):
+        for cell in self.puzzle.cells:
+            cell.hint_is_given = False
+        solution_count = count_solutions(self.puzzle)
+        self.assertEqual(solution_count.count, 2)
+        self.assertTrue(solution_count.reached_limit)
+
+    def test_can_count_without_the_known_solution(self):
+        solution_count = SolutionCounter(
+            self.puzzle, prefer_known_solution=False).count()
+        self.assertEqual(solution_count.count, 1)
+
+    def test_first_solution_is_the_puzzle(self):
+        counter = SolutionCounter(self.puzzle, limit=1)
+        self.assertEqual(counter.count().count, 1)
+        self.assertEqual(
+            [side_id for side_id, value in enumerate(counter.values)
+             if value],
+            [side.id for side in self.board.sides_by_id if side.is_closed])
@@ -0,0 +1,86 @@
+from slithering.solver.degree_solver import DegreeSolver
+from slithering.tests.base.base import BasePuzzleTestCase
+
+
+class BaseTestDegreeSolver(BasePuzzleTestCase):
+    def setUp(self):
+        super(BaseTestDegreeSolver, self).setUp()
+        self.puzzle.state.clear_solved()
+        for cell in self.puzzle.cells:
+            cell.hint_is_given = False
+
+    def solve_sides(self, sides):
+        for side in sides:
+            side.solved_is_closed = side.is_closed
+
+    def test_forces_the_last_side_of_a_corner(self):
+        corner = next(iter(self.puzzle.corners))
+        sides = list(corner.sides)
+        last_side = sides[-1]
+        self.solve_sides(sides[:-1])
+        degree_solver = DegreeSolver(self.puzzle)
+        self.assertTrue(degree_solver.apply())
+        self.assertTrue(last_side.solved)
+        self.assertGreaterEqual(degree_solver.forced_count, 1)
+
+    def test_forces_the_sides_of_a_saturated_hint(self):
+        cell = next(
+            cell
+            for cell in self.puzzle.cells
+            if 0 < cell.hint < len(cell.sides)
+        )
+        cell.hint_is_given = True
+        self.solve_sides(cell.sides.closed)
+        self.assertTrue(DegreeSolver(self.puzzle).apply())
+        self.assertEqual(len(cell.sides.solved), len(cell.sides))
+
+    def test_only_forces_sides_when_a_count_reaches_its_bound(self):
+        self.assertFalse(DegreeSolver(self.puzzle).apply())
+        self.assertFalse(self.puzzle.sides.solved)
+
+    def get_corner_with_many_sides(self):
+        return next(
+            corner
+            for corner in self.puzzle.corners
+            if len(corner.sides) > 2
+        )
+
+    def get_counted_hint_cell(self, degree_solver):
+        cell = next(
+            cell
+            for cell in self.puzzle.cells
+            if 0 < cell.hint < len(cell.sides)
+        )
+        cell.hint_is_given = True
+        degree_solver.count_hint(cell.id)
+
+        return cell
+
+    def test_fails_on_a_corner_with_more_than_two_closed_sides(self):
+        corner = self.get_corner_with_many_sides()
+        degree_solver = DegreeSolver(self.puzzle)
+        degree_solver.corners_closed[corner.id] = 3
+        with self.assertRaisesRegexp(AssertionError, 'Corner'):
+            degree_solver.propagate()
+
+    def test_fails_on_a_corner_with_a_single_closed_side_left(self):
+        corner = self.get_corner_with_many_sides()
+        degree_solver = DegreeSolver(self.puzzle)
+        degree_solver.corners_closed[corner.id] = 1
+        degree_solver.corners_unknown[corner.id] = 0
+        with self.assertRaisesRegexp(AssertionError, 'Corner'):
+            degree_solver.propagate()
+
+    def test_fails_on_a_cell_with_more_closed_sides_than_its_hint(self):
+        degree_solver = DegreeSolver(self.puzzle)
+        cell = self.get_counted_hint_cell(degree_solver)
+        degree_solver.cells_closed[cell.id] = cell.hint + 1
+        with self.assertRaisesRegexp(AssertionError, 'Cell'):
+            degree_solver.propagate()
+
+    def test_fails_on_a_cell_with_too_few_sides_left_for_its_hint(self):
+        degree_solver = DegreeSolver(self.puzzle)
+        cell = self.get_counted_hint_cell(degree_solver)
+        degree_solver.cells_unknown[cell.id] = cell.hint - 1
+        with self.assertRaisesRegexp(AssertionError, 'Cell'):
+            degree_solver.propagate()
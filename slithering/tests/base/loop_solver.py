@@ -0,0 +1,88 @@
+from slithering.solver.loop_solver import LoopSolver
+from slithering.tests.base.base import BasePuzzleTestCase
+
+
+class BaseTestLoopSolver(BasePuzzleTestCase):
+    def get_loop(self):
+        """The corner ids of the loop, in order, and the side ids between"""
+        topology = self.board.topology
+        sides_closed = self.puzzle.state.sides_closed
+        side_id = next(sides_closed.iter_ids())
+        corner_ids = list(topology.side_corners[side_id])
+        side_ids = [side_id]
+        while True:
+            side_id = next(
+                other_side_id
+                for other_side_id in topology.corner_sides[corner_ids[-1]]
+                if sides_closed[other_side_id] and other_side_id != side_id
+            )
+            if side_id == side_ids[0]:
+                break
+            side_ids.append(side_id)
+            corner_id, = \
+                set(topology.side_corners[side_id]) - {corner_ids[-1]}
+            corner_ids.append(corner_id)
+
+        return corner_ids[:-1], side_ids
+
+    def get_chord(self):
+        """
+        An open side between two corners of the loop, with the sides of the
+        loop on either side of it
+        """
+        corner_ids, side_ids = self.get_loop()
+        positions = {
+            corner_id: position
+            for position, corner_id in enumerate(corner_ids)
+        }
+        topology = self.board.topology
+        sides_closed = self.puzzle.state.sides_closed
+        for side_id in xrange(topology.sides_count):
+            if sides_closed[side_id]:
+                continue
+            start, end = sorted(
+                positions.get(corner_id)
+                for corner_id in topology.side_corners[side_id])
+            if start is None:
+                continue
+            arc_side_ids = side_ids[start:end]
+            other_arc_side_ids = side_ids[end:] + side_ids[:start]
+            if len(other_arc_side_ids) >= 3:
+                return side_id, arc_side_ids, other_arc_side_ids
+
+        self.fail("The loop has no chords")
+
+    def solve_sides(self, side_ids):
+        sides_by_id = self.board.sides_by_id
+        for side_id in side_ids:
+            side = sides_by_id[side_id]
+            side.solved_is_closed = side.is_closed
+
+    def test_forbids_closing_a_path_while_there_are_others(self):
+        chord_id, arc_side_ids, other_arc_side_ids = self.get_chord()
+        self.solve_sides(
+            arc_side_ids + [other_arc_side_ids[len(other_arc_side_ids) / 2]])
+        loop_solver = LoopSolver(self.puzzle)
+        self.assertTrue(loop_solver.apply())
+        self.assertEqual(loop_solver.paths_count, 2)
+        self.assertTrue(self.board.sides_by_id[chord_id].solved)
+
+    def test_allows_closing_the_only_path(self):
+        chord_id, arc_side_ids, _ = self.get_chord()
+        self.solve_sides(arc_side_ids)
+        loop_solver = LoopSolver(self.puzzle)
+        self.assertFalse(loop_solver.apply())
+        self.assertEqual(loop_solver.paths_count, 1)
+        self.assertFalse(self.board.sides_by_id[chord_id].solved)
+
+    def test_closing_all_sides_makes_a_single_loop(self):
+        _, side_ids = self.get_loop()
+        loop_solver = LoopSolver(self.puzzle)
+        self.solve_sides(side_ids[:-1])
+        loop_solver.apply()
+        self.assertEqual(loop_solver.paths_count, 1)
+        self.assertEqual(loop_solver.loops_count, 0)
+        self.solve_sides(side_ids[-1:])
+        loop_solver.apply()
+        self.assertEqual(loop_solver.paths_count, 0)
+        self.assertEqual(loop_solver.loops_count, 1)
@@ -0,0 +1,73 @@
+from slithering.solver.minimiser import HintMinimiser, \
+    is_solvable_without_hints
+from slithering.tests.base.base import SolverBase
+from unittest import TestCase
+
+
+class BaseTestHintMinimiser(SolverBase, TestCase):
+    minimiser_board_size = 6
+
+    def create_small_puzzle(self):
+        board_kwargs = dict(
+            self.board_kwargs, width=self.minimiser_board_size,
+            height=self.minimiser_board_size)
+        puzzle = self.create_puzzle(self.board_class(**board_kwargs))
+        puzzle.create_random_puzzle()
+
+        return puzzle
+
+    def create_minimised_puzzle(self, workers):
+        puzzle = self.create_small_puzzle()
+        HintMinimiser(puzzle, workers=workers).minimise()
+
+        return puzzle
+
+    def get_withheld_hints_keys(self, puzzle):
+        return {
+            cell.key
+            for cell in puzzle.cells
+            if not cell.hint_is_given
+        }
+
+    def test_minimised_puzzle_has_withheld_hints(self):
+        puzzle = self.create_minimised_puzzle(workers=1)
+        self.assertTrue(self.get_withheld_hints_keys(puzzle))
+
+    def test_minimised_puzzle_can_be_solved(self):
+        puzzle = self.create_minimised_puzzle(workers=1)
+        self.create_solver(puzzle).solve()
+        self.assertTrue(puzzle.solved)
+
+    def test_minimised_puzzle_is_the_same_with_workers(self):
+        self.assertEqual(
+            self.get_withheld_hints_keys(
+                self.create_minimised_puzzle(workers=2)),
+            self.get_withheld_hints_keys(
+                self.create_minimised_puzzle(workers=1)))
+
+    def test_sharing_deductions_withholds_the_same_hints_as_from_scratch(self):
+        puzzle = self.create_small_puzzle()
+        check_puzzle = puzzle.fork()
+        check_puzzle.state.clear_solved()
+        removed_ids = HintMinimiser(puzzle).find_removable_ids(
+            lambda cell_ids_list: [
+                is_solvable_without_hints(check_puzzle, cell_ids)
+                for cell_ids in cell_ids_list
+            ])
+        self.assertTrue(removed_ids)
+        self.assertEqual(
+            HintMinimiser(puzzle).find_removable_ids_incrementally(
+                check_puzzle),
+            removed_ids)
+        self.assertFalse(check_puzzle.sides.solved)
+        self.assertIsNone(check_puzzle.constraints)
+
+    def test_checking_hints_leaves_the_puzzle_as_it_was(self):
+        puzzle = self.create_small_puzzle()
+        puzzle.state.clear_solved()
+        cell = puzzle.cells.peek()
+        self.assertTrue(is_solvable_without_hints(puzzle, ()))
+        is_solvable_without_hints(puzzle, (cell.id,))
+        self.assertTrue(cell.hint_is_given)
+        self.assertFalse(puzzle.sides.solved)
+        self.assertIsNone(puzzle.constraints)
@@ -8,6 +8,16 @@ class BaseTestBoardCells(BaseBoardTestCase):
     def test_there_are_cells(self):
         self.assertTrue(self.board.cells)
 
+    def test_bound_cells_hash_by_id(self):
+        self.assertEqual(
+            [hash(cell) for cell in self.board.cells_by_id],
+            range(len(self.board.cells_by_id)))
+
+    def test_sets_of_cells_are_iterated_in_the_same_order_on_any_board(self):
+        self.assertEqual(
+            [cell.key for cell in set(self.board.cells)],
+            [cell.key for cell in set(self.create_board().cells)])
+
     def test_every_cell_has_sides(self):
         cells_without_sides = {
             cell
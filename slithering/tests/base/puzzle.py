@@ -1,4 +1,7 @@
+from slithering.base.generator import GeneratorState
 from slithering.tests.base.base import BasePuzzleTestCase
+from slithering.tests.base.batch import BaseTestPuzzleBatch
+from slithering.tests.base.storage import BaseTestPuzzleStorage
 
 
 class BaseTestPuzzle(BasePuzzleTestCase):
@@ -38,7 +41,179 @@ class BaseTestPuzzleCells(BaseTestPuzzle):
         self.assertTrue(self.puzzle.cells.internal)
 
 
+class BaseTestPuzzleState(BaseTestPuzzle):
+    def test_closed_sides_separate_internal_and_external_cells(self):
+        sides_with_wrong_state = {
+            side
+            for side in self.puzzle.sides
+            if side.is_closed != (
+                sum(cell.is_internal for cell in side.cells) == 1)
+        }
+        self.assertFalse(sides_with_wrong_state)
+
+    def test_closed_and_open_sides_partition_sides(self):
+        closed, open_ = self.puzzle.sides.closed, self.puzzle.sides.open
+        self.assertFalse(closed & open_)
+        self.assertEqual(closed | open_, self.puzzle.sides)
+
+    def test_internal_cells_match_cells_state(self):
+        self.assertEqual(
+            self.puzzle.cells.internal,
+            {cell for cell in self.puzzle.cells if cell.is_internal})
+
+    def test_derived_properties_are_cached_until_a_change(self):
+        cache = self.puzzle.state.cache
+        a_cell = self.puzzle.cells.internal.peek()
+        hint = a_cell.hint
+        hits, misses = cache.hits, cache.misses
+        self.assertEqual(a_cell.hint, hint)
+        self.assertEqual((cache.hits, cache.misses), (hits + 1, misses))
+
+        an_external_cell = self.puzzle.cells.external.peek()
+        misses = cache.misses
+        an_external_cell.is_internal = True
+        a_cell.hint
+        self.assertEqual(cache.misses, misses + 1)
+
+
+class BaseTestPuzzleFork(BaseTestPuzzle):
+    def test_fork_shares_the_topology(self):
+        fork = self.puzzle.fork()
+        self.assertIs(fork.board.topology, self.puzzle.board.topology)
+
+    def test_fork_has_the_same_internal_cells(self):
+        fork = self.puzzle.fork()
+        self.assertEqual(
+            {cell.key for cell in fork.cells.internal},
+            {cell.key for cell in self.puzzle.cells.internal})
+
+    def test_changing_the_fork_does_not_change_the_puzzle(self):
+        fork = self.puzzle.fork()
+        external_cell = fork.cells.external.peek()
+        external_cell.is_internal = True
+        self.assertFalse(self.puzzle.cells[external_cell.key].is_internal)
+
+    def test_changing_the_puzzle_does_not_change_the_fork(self):
+        fork = self.puzzle.fork()
+        external_cell = self.puzzle.cells.external.peek()
+        external_cell.is_internal = True
+        self.assertFalse(fork.cells[external_cell.key].is_internal)
+
+
+class BaseTestPuzzleSnapshot(BaseTestPuzzle):
+    def test_restoring_undoes_the_changes(self):
+        internal_cells = self.puzzle.cells.internal
+        closed_sides = self.puzzle.sides.closed
+        snapshot = self.puzzle.snapshot()
+        self.puzzle.cells.set(False)
+        self.puzzle.sides.peek().solved_is_closed = \
+            self.puzzle.sides.peek().is_closed
+        self.puzzle.restore(snapshot)
+        self.assertEqual(self.puzzle.cells.internal, internal_cells)
+        self.assertEqual(self.puzzle.sides.closed, closed_sides)
+        self.assertFalse(self.puzzle.sides.solved)
+
+    def test_restoring_records_only_the_changes(self):
+        snapshot = self.puzzle.snapshot()
+        self.puzzle.cells.external.peek().is_internal = True
+        self.assertEqual(len(self.puzzle.state.trail), snapshot + 1)
+
+    def test_restoring_a_nested_snapshot_keeps_earlier_changes(self):
+        outer_snapshot = self.puzzle.snapshot()
+        first_cell = self.puzzle.cells.external.peek()
+        first_cell.is_internal = True
+        inner_snapshot = self.puzzle.snapshot()
+        second_cell = self.puzzle.cells.external.peek()
+        second_cell.is_internal = True
+        self.puzzle.restore(inner_snapshot)
+        self.assertTrue(first_cell.is_internal)
+        self.assertFalse(second_cell.is_internal)
+        self.puzzle.restore(outer_snapshot)
+        self.assertFalse(first_cell.is_internal)
+
+    def test_releasing_the_first_snapshot_stops_recording(self):
+        snapshot = self.puzzle.snapshot()
+        self.puzzle.release(snapshot)
+        self.puzzle.cells.external.peek().is_internal = True
+        self.assertIsNone(self.puzzle.state.trail)
+
+    def test_releasing_a_nested_snapshot_keeps_recording(self):
+        outer_snapshot = self.puzzle.snapshot()
+        inner_snapshot = self.puzzle.snapshot()
+        self.assertEqual(inner_snapshot, outer_snapshot)
+        self.puzzle.release(inner_snapshot)
+        cell = self.puzzle.cells.external.peek()
+        cell.is_internal = True
+        self.puzzle.restore(outer_snapshot)
+        self.assertFalse(cell.is_internal)
+        self.puzzle.release(outer_snapshot)
+        self.assertIsNone(self.puzzle.state.trail)
+
+
+class BaseTestPuzzleGenerator(BaseTestPuzzle):
+    def create_cells_sequence_from_board(self, puzzle):
+        """The original generation, that recalculates everything every step"""
+        target_internal_cells_count = \
+            len(puzzle.cells) * puzzle.target_internal_cells_percentage
+        cell = puzzle.get_random_starting_cell_for_puzzle()
+        while True:
+            yield cell
+            cell.is_internal = True
+            if len(puzzle.cells.internal) >= target_internal_cells_count:
+                break
+            cells_by_ratio = puzzle.get_permissible_puzzle_cells()\
+                .grouped_by_internal_adjacent_cells_ratio
+            ratios = sorted(cells_by_ratio)
+            minimum_ratio = puzzle.random.random()
+            passing_ratios = [
+                ratio
+                for ratio in ratios
+                if ratio >= minimum_ratio
+            ]
+            ratio = (passing_ratios or ratios)[0]
+            cell = puzzle.random.choice(sorted(cells_by_ratio[ratio]))
+
+    def test_generation_is_the_same_as_recalculating_from_the_board(self):
+        puzzle = self.create_puzzle(self.create_board())
+        cells_sequence = puzzle.create_random_puzzle_from_cells_sequence(
+            puzzle.create_random_puzzle_cells_sequence())
+        puzzle_from_board = self.create_puzzle(self.create_board())
+        self.assertEqual(
+            [cell.key for cell in cells_sequence],
+            [cell.key for cell
+             in self.create_cells_sequence_from_board(puzzle_from_board)])
+
+    def test_generator_state_matches_the_board(self):
+        generator_state = GeneratorState(self.board)
+        self.assertEqual(generator_state.internal_count,
+                         len(self.puzzle.cells.internal))
+        self.assertEqual(
+            generator_state.frontier,
+            {cell.id for cell in self.puzzle.cells.internal.border})
+        self.assertEqual(
+            generator_state.permissible.ratio_by_id,
+            {
+                cell.id: ratio
+                for ratio, cells in self.puzzle.get_permissible_puzzle_cells()
+                .grouped_by_internal_adjacent_cells_ratio.iteritems()
+                for cell in cells
+            })
+        self.assertEqual(
+            sorted(generator_state.permissible.buckets_by_ratio),
+            generator_state.permissible.ratios)
+        self.assertEqual(
+            list(generator_state.adjacent_internal_counts),
+            [len(cell.adjacent_cells.internal)
+             for cell in self.board.cells_by_id])
+
+
 class BaseAllPuzzleTests(
+        BaseTestPuzzleBatch,
+        BaseTestPuzzleGenerator,
+        BaseTestPuzzleStorage,
+        BaseTestPuzzleSnapshot,
+        BaseTestPuzzleFork,
+        BaseTestPuzzleState,
         BaseTestPuzzleCells,
         BaseTestPuzzleCreation,
         BaseTestPuzzle):
@@ -0,0 +1,76 @@
+from slithering.solver.constraints import Constraints
+from slithering.solver.custom_sub_solvers import CellHintSubSolver, \
+    CornerConstraints
+from slithering.solver.sat import SatSolver
+from slithering.solver.sat_constraint_solver import SatConstraintSolver
+from slithering.tests.base.base import BasePuzzleTestCase
+
+
+class BaseTestSatConstraintSolver(BasePuzzleTestCase):
+    def create_sat_solver(self, clauses):
+        sat_solver = SatSolver()
+        for clause in clauses:
+            sat_solver.add_clause(clause)
+
+        return sat_solver
+
+    def test_finds_a_model(self):
+        clauses = [[1, 2], [-1, 2], [-2, 3, 4], [-3, -4]]
+        model = self.create_sat_solver(clauses).solve()
+        self.assertTrue(all(
+            any(model[abs(literal)] == (literal > 0) for literal in clause)
+            for clause in clauses
+        ))
+
+    def test_detects_unsatisfiable_clauses(self):
+        sat_solver = self.create_sat_solver([[1, 2], [1, -2], [-1, 3], [-3]])
+        self.assertIsNone(sat_solver.solve())
+        self.assertIsNone(sat_solver.get_backbone([1, 2, 3]))
+
+    def test_solves_under_assumptions(self):
+        sat_solver = self.create_sat_solver([[-1, 2], [-2, 3]])
+        self.assertIsNone(sat_solver.solve([1, -3]))
+        self.assertTrue(sat_solver.solve([1])[3])
+        self.assertIsNotNone(sat_solver.solve())
+
+    def test_backbone_is_what_all_models_agree_on(self):
+        sat_solver = self.create_sat_solver(
+            [[1, 2], [-1, 2], [-2, 3, 4], [-3, -4], [5, -6]])
+        self.assertEqual(sat_solver.get_backbone(range(1, 7)), {2})
+
+    def test_solves_sides_from_constraints(self):
+        self.puzzle.state.clear_solved()
+        self.puzzle.constraints = Constraints()
+        self.puzzle.constraints.update(
+            [
+                CellHintSubSolver(self.puzzle, cell).constraint()
+                for cell in self.puzzle.cells
+            ] + [
+                CornerConstraints(self.puzzle, corner).constraint()
+                for corner in self.puzzle.corners
+            ]
+        )
+        self.assertTrue(SatConstraintSolver(self.puzzle).apply())
+        self.assertTrue(self.puzzle.sides.solved)
+        self.assertFalse(SatConstraintSolver(self.puzzle).apply())
+
+    def test_checks_only_the_groups_that_changed(self):
+        self.puzzle.state.clear_solved()
+        self.puzzle.constraints = Constraints()
+        self.puzzle.constraints.update(
+            CellHintSubSolver(self.puzzle, cell).constraint()
+            for cell in self.puzzle.cells
+        )
+        sat_constraint_solver = SatConstraintSolver(self.puzzle)
+        while sat_constraint_solver.apply():
+            pass
+        self.assertFalse(self.puzzle.board.solved)
+        self.assertEqual(sat_constraint_solver.get_changed_groups(), [])
+
+        self.puzzle.constraints.update(
+            CornerConstraints(self.puzzle, corner).constraint()
+            for corner in self.puzzle.corners
+        )
+        self.assertTrue(sat_constraint_solver.get_changed_groups())
+        self.assertTrue(sat_constraint_solver.apply())
+        self.assertTrue(self.puzzle.board.solved)
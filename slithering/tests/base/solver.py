@@ -1,6 +1,261 @@
+from slithering.solver.sub_solvers import CellSubSolver, CornerSubSolver, \
+    PuzzleSubSolver, SideSubSolver, TIER_CONSTRAINTS, TIER_LOCAL, \
+    TIER_NAMES, TIER_SAT
 from slithering.tests.base.base import BaseSolverTestCase
 
 
+class CellNextToSolvedPartsSubSolver(CellSubSolver):
+    """Suitable once a side, or an adjacent cell, of the cell is solved"""
+    @classmethod
+    def is_suitable(cls, puzzle, cell):
+        return any(cell.sides.solved) or any(cell.adjacent_cells.solved)
+
+    def apply(self):
+        self.finished = True
+        return False
+
+
+class SideNextToSolvedSidesSubSolver(SideSubSolver):
+    """Suitable once a side that shares a corner with the side is solved"""
+    @classmethod
+    def is_suitable(cls, puzzle, side):
+        return any(side.neighbours.solved)
+
+    def apply(self):
+        self.finished = True
+        return False
+
+
+class CornerNextToSolvedCornersSubSolver(CornerSubSolver):
+    """Suitable once a corner that shares a side with the corner is solved"""
+    @classmethod
+    def is_suitable(cls, puzzle, corner):
+        return any(corner.neighbours.solved)
+
+    def apply(self):
+        self.finished = True
+        return False
+
+
 class BaseTestPuzzleSolver(BaseSolverTestCase):
     def test_can_solve_puzzle(self):
         self.assertTrue(self.puzzle.solved)
+
+    def create_solver_with_neighbourhood_sub_solvers(self, puzzle):
+        solver_class = type('SolverWithNeighbourhoodSubSolvers', (
+            self.solver_class,), {
+            'cell_sub_solver_classes':
+                self.solver_class.cell_sub_solver_classes
+                + [CellNextToSolvedPartsSubSolver],
+            'side_sub_solver_classes':
+                self.solver_class.side_sub_solver_classes
+                + [SideNextToSolvedSidesSubSolver],
+            'corner_sub_solver_classes':
+                self.solver_class.corner_sub_solver_classes
+                + [CornerNextToSolvedCornersSubSolver],
+        })
+
+        return solver_class(puzzle, debug=False)
+
+    def assert_finds_new_sub_solvers_like_a_full_rescan(
+            self, solve_parts, sub_solver_class):
+        puzzle = self.puzzle.fork()
+        puzzle.state.clear_solved()
+        solver = self.create_solver_with_neighbourhood_sub_solvers(puzzle)
+        solve_parts(puzzle)
+
+        all_new_sub_solvers = \
+            solver.find_new_sub_solvers() - solver.all_sub_solvers
+        self.assertTrue(any(
+            isinstance(sub_solver, sub_solver_class)
+            for sub_solver in all_new_sub_solvers
+        ))
+        self.assertEqual(
+            solver.find_new_sub_solvers(*solver.get_parts_around_changes())
+            - solver.all_sub_solvers,
+            all_new_sub_solvers)
+        self.assertEqual(
+            solver.find_new_sub_solvers(*solver.get_parts_around_changes())
+            - solver.all_sub_solvers,
+            frozenset())
+
+    def test_finds_new_sub_solvers_only_around_changes(self):
+        def solve_parts(puzzle):
+            for side in list(puzzle.sides)[::3]:
+                side.solved_is_closed = side.is_closed
+            for cell in list(puzzle.cells)[::5]:
+                cell.solved_is_internal = cell.is_internal
+
+        self.assert_finds_new_sub_solvers_like_a_full_rescan(
+            solve_parts, CellNextToSolvedPartsSubSolver)
+
+    def test_finds_new_sub_solvers_around_a_solved_cell(self):
+        def solve_parts(puzzle):
+            cell = puzzle.board.cells_by_id[len(puzzle.cells) / 2]
+            cell.solved_is_internal = cell.is_internal
+
+        self.assert_finds_new_sub_solvers_like_a_full_rescan(
+            solve_parts, CellNextToSolvedPartsSubSolver)
+
+    def test_finds_new_sub_solvers_around_a_solved_side(self):
+        def solve_parts(puzzle):
+            side = puzzle.board.sides_by_id[len(puzzle.sides) / 2]
+            side.solved_is_closed = side.is_closed
+
+        self.assert_finds_new_sub_solvers_like_a_full_rescan(
+            solve_parts, SideNextToSolvedSidesSubSolver)
+
+    def test_finds_new_sub_solvers_around_a_solved_corner(self):
+        def solve_parts(puzzle):
+            corner = puzzle.board.corners_by_id[len(puzzle.corners) / 2]
+            corner.solved_is_used = corner.is_used
+
+        self.assert_finds_new_sub_solvers_like_a_full_rescan(
+            solve_parts, CornerNextToSolvedCornersSubSolver)
+
+    def test_sub_solvers_of_different_puzzles_are_different(self):
+        fork = self.puzzle.fork()
+        cell = self.puzzle.cells.peek()
+        self.assertEqual(
+            PuzzleSubSolver(self.puzzle), PuzzleSubSolver(self.puzzle))
+        self.assertNotEqual(
+            PuzzleSubSolver(self.puzzle), PuzzleSubSolver(fork))
+        self.assertNotEqual(
+            CellNextToSolvedPartsSubSolver(self.puzzle, cell),
+            CellNextToSolvedPartsSubSolver(fork, fork.cells[cell.key]))
+
+    def test_sub_solvers_of_classes_with_the_same_name_are_different(self):
+        sub_solver_class, other_sub_solver_class = (
+            type('SameNameSubSolver', (PuzzleSubSolver,), {})
+            for _ in xrange(2)
+        )
+        self.assertNotEqual(
+            sub_solver_class(self.puzzle),
+            other_sub_solver_class(self.puzzle))
+
+    def solve_with_sub_solvers_in_order(self, puzzle, reverse):
+        class SolverInOrder(self.solver_class):
+            def apply_tier(self, tier):
+                changed = False
+                for sub_solver in sorted(
+                        self.sub_solvers, reverse=reverse,
+                        key=lambda sub_solver: (
+                            type(sub_solver).__name__,
+                            sub_solver.hash_key()[2:])):
+                    if sub_solver.tier == tier:
+                        changed |= sub_solver.apply()
+
+                return changed
+
+        puzzle = puzzle.fork()
+        SolverInOrder(puzzle, debug=False).solve()
+
+        return puzzle.state.sides_solved.mask
+
+    def test_deductions_dont_depend_on_the_order_of_sub_solvers(self):
+        # Sub-solvers hash by object ids, so each process applies them in a
+        # different order
+        puzzle = self.puzzle.fork()
+        puzzle.state.clear_solved()
+        for cell in list(puzzle.cells)[::2]:
+            cell.hint_is_given = False
+        self.assertEqual(
+            self.solve_with_sub_solvers_in_order(puzzle, reverse=False),
+            self.solve_with_sub_solvers_in_order(puzzle, reverse=True))
+
+    def test_keeps_going_after_a_round_that_only_found_new_sub_solvers(self):
+        puzzle = self.puzzle.fork()
+        puzzle.state.clear_solved()
+        # Only sub-solvers that never make any changes
+        solver_class = type('SolverWithOnlyNeighbourhoodSubSolvers', (
+            self.solver_class,), {
+            'puzzle_sub_solver_classes': [],
+            'cell_sub_solver_classes': [CellNextToSolvedPartsSubSolver],
+            'side_sub_solver_classes': [SideNextToSolvedSidesSubSolver],
+            'corner_sub_solver_classes': [],
+        })
+        solver = solver_class(puzzle, debug=False)
+        self.assertFalse(solver.apply())
+
+        side = puzzle.sides.peek()
+        side.solved_is_closed = side.is_closed
+        sides_solved_mask = puzzle.state.sides_solved.mask
+        self.assertTrue(solver.apply())
+        self.assertEqual(puzzle.state.sides_solved.mask, sides_solved_mask)
+        self.assertFalse(solver.apply())
+
+    def test_applies_cheaper_tiers_first(self):
+        puzzle = self.puzzle.fork()
+        puzzle.state.clear_solved()
+        for side in puzzle.sides.on_edge:
+            side.solved_is_closed = side.is_closed
+        solver = self.solver_class(puzzle, debug=False)
+        self.assertTrue(any(
+            sub_solver.tier == TIER_LOCAL
+            for sub_solver in solver.sub_solvers
+        ))
+
+        self.assertTrue(solver.apply())
+        self.assertGreater(solver.tier_durations[TIER_LOCAL], 0)
+        self.assertEqual(solver.tier_durations[TIER_CONSTRAINTS], 0)
+
+    def test_applies_sat_tier_when_cheaper_tiers_stall(self):
+        puzzle = self.puzzle.fork()
+        puzzle.state.clear_solved()
+        for cell in list(puzzle.cells)[::2]:
+            cell.hint_is_given = False
+        solver = self.solver_class(puzzle, debug=False)
+
+        sat_rounds_count = 0
+        while True:
+            sat_duration = solver.tier_durations[TIER_SAT]
+            sides_solved_mask = puzzle.state.sides_solved.mask
+            if not solver.apply():
+                break
+            # The SAT tier only runs if the local and the constraints tiers
+            # didn't change anything
+            if solver.tier_durations[TIER_SAT] > sat_duration \
+                    and puzzle.state.sides_solved.mask != sides_solved_mask:
+                sat_rounds_count += 1
+
+        self.assertGreater(sat_rounds_count, 0)
+
+    def test_doesnt_apply_tiers_above_the_max_tier(self):
+        puzzle = self.puzzle.fork()
+        puzzle.state.clear_solved()
+        solver = self.solver_class(puzzle, debug=False)
+        solver.max_tier = TIER_LOCAL
+        solver.solve()
+        self.assertGreater(solver.tier_durations[TIER_LOCAL], 0)
+        self.assertEqual(solver.tier_durations[TIER_CONSTRAINTS], 0)
+        self.assertEqual(solver.tier_durations[TIER_SAT], 0)
+
+    def test_forked_solver_goes_on_with_hints_given_after_forking(self):
+        puzzle = self.puzzle.fork()
+        puzzle.state.clear_solved()
+        for cell in puzzle.cells:
+            cell.hint_is_given = False
+        solver = self.solver_class(puzzle, debug=False)
+        solver.solve()
+        self.assertFalse(puzzle.solved)
+        sides_solved_mask = puzzle.state.sides_solved.mask
+
+        snapshot = puzzle.snapshot()
+        constraints = puzzle.constraints
+        puzzle.constraints = constraints.copy()
+        for cell in puzzle.cells:
+            cell.hint_is_given = True
+        solver.fork().solve()
+        self.assertTrue(puzzle.solved)
+
+        puzzle.constraints = constraints
+        puzzle.restore(snapshot)
+        puzzle.release(snapshot)
+        self.assertFalse(solver.apply())
+        self.assertEqual(puzzle.state.sides_solved.mask, sides_solved_mask)
+
+    def test_reports_time_per_tier(self):
+        self.assertGreater(self.solver.tier_durations[TIER_LOCAL], 0)
+        report = self.solver.get_tier_durations_report()
+        for tier_name in TIER_NAMES.itervalues():
+            self.assertIn(tier_name, report)
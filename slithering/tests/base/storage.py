@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+
+from slithering.base import storage
+from slithering.tests.base.base import BasePuzzleTestCase
+
+
+class BaseTestPuzzleStorage(BasePuzzleTestCase):
+    def setUp(self):
+        super(BaseTestPuzzleStorage, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'puzzle.slithering')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super(BaseTestPuzzleStorage, self).tearDown()
+
+    def save_and_load(self):
+        self.puzzle.save(self.filename)
+        return type(self.puzzle).load(self.filename)
+
+    def test_loaded_puzzle_has_the_same_cells(self):
+        self.puzzle.cells.peek().hint_is_given = False
+        loaded_puzzle = self.save_and_load()
+        self.assertIs(type(loaded_puzzle), type(self.puzzle))
+        self.assertEqual(loaded_puzzle.seed, self.puzzle.seed)
+        self.assertEqual(
+            {cell.key for cell in loaded_puzzle.cells.internal},
+            {cell.key for cell in self.puzzle.cells.internal})
+        self.assertEqual(
+            {cell.key for cell in loaded_puzzle.cells
+             if not cell.hint_is_given},
+            {cell.key for cell in self.puzzle.cells
+             if not cell.hint_is_given})
+
+    def test_loaded_puzzle_has_the_same_topology(self):
+        topology = self.puzzle.board.topology
+        loaded_topology = self.save_and_load().board.topology
+        self.assertEqual(loaded_topology.cell_keys, topology.cell_keys)
+        self.assertEqual(loaded_topology.corner_keys, topology.corner_keys)
+        for relation_name in ('cell_sides', 'side_corners', 'cell_neighbours'):
+            self.assertEqual(
+                map(list, loaded_topology.relation(relation_name)),
+                map(list, topology.relation(relation_name)))
+
+    def test_loaded_puzzle_has_the_same_closed_sides(self):
+        loaded_puzzle = self.save_and_load()
+        self.assertEqual(
+            {side.id for side in loaded_puzzle.sides.closed},
+            {side.id for side in self.puzzle.sides.closed})
+
+    def test_loaded_puzzle_has_the_same_solved_sides(self):
+        side = self.puzzle.sides.peek()
+        side.solved_is_closed = side.is_closed
+        loaded_puzzle = self.save_and_load()
+        self.assertEqual(
+            [loaded_side.id for loaded_side in loaded_puzzle.sides.solved],
+            [side.id])
+
+    def test_cannot_load_other_files(self):
+        with open(self.filename, 'wb') as f:
+            f.write('Not a puzzle')
+        with self.assertRaises(storage.StorageError):
+            storage.load_puzzle(self.filename)
+
+    def test_cannot_load_empty_files(self):
+        open(self.filename, 'wb').close()
+        with self.assertRaises(storage.StorageError):
+            storage.load_puzzle(self.filename)
+
+    def test_cannot_load_other_format_versions(self):
+        self.puzzle.save(self.filename)
+        with open(self.filename, 'r+b') as f:
+            f.write(storage.HEADER.pack(storage.MAGIC, 0, 0))
+        with self.assertRaises(storage.StorageError):
+            storage.load_puzzle(self.filename)
@@ -0,0 +1,69 @@
+from slithering.tests.base.base import BaseBoardTestCase
+
+
+class BaseTestBoardTopology(BaseBoardTestCase):
+    def test_ids_are_dense(self):
+        for parts_by_id in (self.board.cells_by_id,
+                            self.board.sides_by_id,
+                            self.board.corners_by_id):
+            self.assertEqual(
+                [part.id for part in parts_by_id],
+                range(len(parts_by_id)))
+
+    def test_topology_counts_match_parts(self):
+        topology = self.board.topology
+        self.assertEqual(topology.cells_count, len(self.board.cells))
+        self.assertEqual(topology.sides_count, len(self.board.sides))
+        self.assertEqual(topology.corners_count, len(self.board.corners))
+
+    def test_cell_sides_relation_matches_parts(self):
+        cell_sides = self.board.topology.cell_sides
+        cells_with_different_sides = {
+            cell
+            for cell in self.board.cells
+            if {side.id for side in cell.sides} != set(cell_sides[cell.id])
+        }
+        self.assertFalse(cells_with_different_sides)
+
+    def test_side_corners_relation_matches_parts(self):
+        side_corners = self.board.topology.side_corners
+        sides_with_different_corners = {
+            side
+            for side in self.board.sides
+            if {corner.id for corner in side.corners}
+            != set(side_corners[side.id])
+        }
+        self.assertFalse(sides_with_different_corners)
+
+    def test_related_parts_are_created_once(self):
+        a_cell = self.board.cells.peek()
+        self.assertIs(a_cell.neighbours, a_cell.neighbours)
+
+    def test_parts_are_slotted(self):
+        parts_with_dict = [
+            part
+            for part in (self.board.cells.peek(),
+                         self.board.sides.peek(),
+                         self.board.corners.peek())
+            if hasattr(part, '__dict__')
+        ]
+        self.assertFalse(parts_with_dict)
+
+    def test_bound_parts_dont_keep_their_building_sets(self):
+        parts_with_building_sets = [
+            part
+            for part in (self.board.cells.peek(),
+                         self.board.sides.peek(),
+                         self.board.corners.peek())
+            if any(
+                getattr(part, building_attribute) is not None
+                for building_attribute in part.building_attributes
+            )
+        ]
+        self.assertFalse(parts_with_building_sets)
+
+    def test_boards_of_the_same_shape_share_the_topology(self):
+        self.assertIs(self.create_board().topology, self.board.topology)
+
+    def test_boards_of_the_same_shape_have_their_own_state(self):
+        self.assertIsNot(self.create_board().state, self.board.state)
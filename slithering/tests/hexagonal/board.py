@@ -1,3 +1,4 @@
+from slithering.base.board import Board
 from slithering.tests import regular_polygon as _regular_polygon
 from slithering.tests.hexagonal import base as _hexagonal_base
 
@@ -44,3 +45,67 @@ class TestHexagonalBoard(
             if cell not in next_cell.neighbours
         }
         self.assertFalse(cells_that_are_not_neighbours_in_column)
+
+    def test_rows_have_cells_of_row_in_order(self):
+        rows_with_wrong_cells = [
+            y
+            for y, row in enumerate(self.board.rows)
+            if [cell.key for cell in row]
+            != [(x, y) for x in xrange(self.board.width)]
+        ]
+        self.assertFalse(rows_with_wrong_cells)
+
+    def test_first_ring_is_neighbours(self):
+        for key in [(5, 5), (5, 6)]:
+            cell = self.board.cells[key]
+            self.assertEqual(set(self.board.ring(cell.key, 1)),
+                             cell.neighbours)
+
+    def test_second_ring_is_neighbours_of_first_ring(self):
+        cell = self.board.cells[(5, 5)]
+        first_ring = set(self.board.ring(cell.key, 1))
+        expected_second_ring = {
+            neighbour
+            for ring_cell in first_ring
+            for neighbour in ring_cell.neighbours
+        } - first_ring - {cell}
+        second_ring = self.board.ring(cell.key, 2)
+        self.assertEqual(len(second_ring), 12)
+        self.assertEqual(set(second_ring), expected_second_ring)
+
+    def get_cells_sides_positions(self, topology):
+        corners_positions = [
+            self.board.get_corner_position(*corner_key)
+            for corner_key in topology.corner_keys
+        ]
+        return [
+            {
+                frozenset(
+                    corners_positions[corner_id]
+                    for corner_id in topology.side_corners[side_id]
+                )
+                for side_id in cell_side_ids
+            }
+            for cell_side_ids in topology.cell_sides
+        ]
+
+    def test_topology_is_the_same_as_the_one_built_from_parts(self):
+        topology = self.board.topology
+        parts_topology = Board.create_topology(self.board)
+        self.assertEqual(topology.cell_keys, parts_topology.cell_keys)
+        self.assertEqual(topology.sides_count, parts_topology.sides_count)
+        self.assertEqual(topology.corners_count, parts_topology.corners_count)
+        self.assertEqual(self.get_cells_sides_positions(topology),
+                         self.get_cells_sides_positions(parts_topology))
+
+    def test_corner_keys_are_the_first_cell_with_the_corner(self):
+        corner_keys_by_position = {}
+        for x in xrange(self.board.width):
+            for y in xrange(self.board.height):
+                for corner_index in xrange(6):
+                    corner_keys_by_position.setdefault(
+                        self.board.get_corner_position(x, y, corner_index),
+                        (x, y, corner_index))
+        self.assertEqual(
+            sorted(self.board.topology.corner_keys),
+            sorted(corner_keys_by_position.itervalues()))
@@ -6,3 +6,51 @@ class TestHexagonalPuzzleSolver(
         _hexagonal_base.HexagonalBase,
         _base.BaseTestPuzzleSolver):
     pass
+
+
+class TestHexagonalHintMinimiser(
+        _hexagonal_base.HexagonalBase,
+        _base.BaseTestHintMinimiser):
+    pass
+
+
+class TestHexagonalSolutionCounter(
+        _hexagonal_base.HexagonalBase,
+        _base.BaseTestSolutionCounter):
+    pass
+
+
+class TestHexagonalConstraints(
+        _hexagonal_base.HexagonalBase,
+        _base.BaseTestConstraints):
+    pass
+
+
+class TestHexagonalTableConstraint(
+        _hexagonal_base.HexagonalBase,
+        _base.BaseTestTableConstraint):
+    pass
+
+
+class TestHexagonalLoopSolver(
+        _hexagonal_base.HexagonalBase,
+        _base.BaseTestLoopSolver):
+    pass
+
+
+class TestHexagonalCellParitySolver(
+        _hexagonal_base.HexagonalBase,
+        _base.BaseTestCellParitySolver):
+    pass
+
+
+class TestHexagonalDegreeSolver(
+        _hexagonal_base.HexagonalBase,
+        _base.BaseTestDegreeSolver):
+    pass
+
+
+class TestHexagonalSatConstraintSolver(
+        _hexagonal_base.HexagonalBase,
+        _base.BaseTestSatConstraintSolver):
+    pass
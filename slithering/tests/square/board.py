@@ -30,3 +30,29 @@ class TestSquareBoard(
             if cell not in next_cell.neighbours
         }
         self.assertFalse(cells_that_are_not_neighbours_in_column)
+
+    def test_rows_have_cells_of_row_in_order(self):
+        rows_with_wrong_cells = [
+            y
+            for y, row in enumerate(self.board.rows)
+            if [cell.key for cell in row]
+            != [(x, y) for x in xrange(self.board.width)]
+        ]
+        self.assertFalse(rows_with_wrong_cells)
+
+    def test_columns_have_cells_of_column_in_order(self):
+        columns_with_wrong_cells = [
+            x
+            for x, column in enumerate(self.board.columns)
+            if [cell.key for cell in column]
+            != [(x, y) for y in xrange(self.board.height)]
+        ]
+        self.assertFalse(columns_with_wrong_cells)
+
+    def test_first_ring_is_adjacent_cells(self):
+        cell = self.board.cells[(5, 5)]
+        self.assertEqual(set(self.board.ring(cell.key, 1)),
+                         cell.adjacent_cells)
+
+    def test_ring_on_edge_is_clipped(self):
+        self.assertEqual(len(self.board.ring((0, 0), 2)), 5)
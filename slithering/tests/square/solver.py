@@ -6,3 +6,51 @@ class TestSquarePuzzleSolver(
         _square_base.SquareBase,
         _base.BaseTestPuzzleSolver):
     pass
+
+
+class TestSquareHintMinimiser(
+        _square_base.SquareBase,
+        _base.BaseTestHintMinimiser):
+    pass
+
+
+class TestSquareSolutionCounter(
+        _square_base.SquareBase,
+        _base.BaseTestSolutionCounter):
+    pass
+
+
+class TestSquareConstraints(
+        _square_base.SquareBase,
+        _base.BaseTestConstraints):
+    pass
+
+
+class TestSquareTableConstraint(
+        _square_base.SquareBase,
+        _base.BaseTestTableConstraint):
+    pass
+
+
+class TestSquareLoopSolver(
+        _square_base.SquareBase,
+        _base.BaseTestLoopSolver):
+    pass
+
+
+class TestSquareCellParitySolver(
+        _square_base.SquareBase,
+        _base.BaseTestCellParitySolver):
+    pass
+
+
+class TestSquareDegreeSolver(
+        _square_base.SquareBase,
+        _base.BaseTestDegreeSolver):
+    pass
+
+
+class TestSquareSatConstraintSolver(
+        _square_base.SquareBase,
+        _base.BaseTestSatConstraintSolver):
+    pass
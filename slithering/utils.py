@@ -1,5 +1,6 @@
 import os
 import errno
+import weakref
 
 BASE_DIRECTORY = os.path.realpath(os.path.join(os.path.dirname(__file__), '..'))
 
@@ -42,3 +43,90 @@ class cached_property_on_freeze(cached_property):
         instance.__dict__[key] = self._get(instance, owner)
 
         return instance.__dict__[key]
+
+
+class VersionCache(object):
+    """
+    A cache of values that are valid only as long as the `version` of an
+    object doesn't change
+    """
+    def __init__(self, versioned):
+        self.versioned = versioned
+        self.version = versioned.version
+        self.values = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        if self.version != self.versioned.version:
+            self.values.clear()
+            self.version = self.versioned.version
+
+        if key in self.values:
+            self.hits += 1
+            return self.values[key]
+
+        self.misses += 1
+        value = self.values[key] = compute()
+
+        return value
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        if not total:
+            return 0.
+
+        return 1. * self.hits / total
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+
+class Interner(object):
+    """
+    A table of unique values by key, so that equal values can be the same
+    object. Values are only kept while they are used elsewhere.
+
+    The hits and misses of all the tables are counted together, and only
+    ever go up, so that their users can tell how many of the values they
+    asked for were reused, from the counts before and after
+    """
+    hits = 0
+    misses = 0
+
+    def __init__(self):
+        self.values = weakref.WeakValueDictionary()
+
+    def __len__(self):
+        return len(self.values)
+
+    def get(self, key, create, *args):
+        """The value for the key, or a new one from `create(*args)`"""
+        value = self.values.get(key)
+        if value is not None:
+            Interner.hits += 1
+            return value
+
+        Interner.misses += 1
+        value = self.values[key] = create(*args)
+
+        return value
+
+
+class cached_property_on_version(property):
+    """
+    A property cached in the `version_cache` of the instance, if it has one,
+    until the version changes
+    """
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        version_cache = instance.version_cache
+        if version_cache is None:
+            return self.fget(instance)
+
+        return version_cache.get(
+            (self.fget.func_name, instance), lambda: self.fget(instance))